@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# Benchmarks the breadth-first search puzzle solvers.
+#
+# Each solver's solve.py is imported from its puzzle directory (with output
+# suppressed, since some of them solve their puzzle at import time), then
+# solve() is run on the built-in start state and on generated (often larger)
+# instances. For every case this records the best wall time of REPEATS runs,
+# the peak traced memory of one extra run, and the number of generated states
+# per second (counted by wrapping each module's successor function).
+#
+# Results are compared against the baseline file, flagging cases which got
+# slower or use more memory than TOLERANCE allows, or whose state/solution
+# counts changed. Exits with status 1 on regressions.
+#
+# Usage (with the repository root on PYTHONPATH, see the README):
+#   ./bfs_solvers.py                  # compare against the baseline
+#   ./bfs_solvers.py --save           # (re)write the baseline
+#   ./bfs_solvers.py -k <substring>   # only run matching cases
+#   ./bfs_solvers.py -r <repeats> -t <tolerance>
+
+import importlib.util
+import io
+import json
+import platform
+import sys
+import tracemalloc
+from contextlib import chdir, redirect_stdout
+from dataclasses import dataclass, field
+from itertools import permutations, product
+from pathlib import Path
+from random import Random
+from time import perf_counter
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+PUZZLES_DIR = ROOT / 'puzzles'
+BASELINE_PATH = Path(__file__).resolve().parent / 'bfs_baseline.json'
+
+REPEATS = 3
+TOLERANCE = 0.2  # allowed relative increase in time/memory
+NOISE = 0.002  # time differences (in seconds) too small to flag
+SEED = 0
+
+# successor states generated since the last reset (see count_yields)
+generated = 0
+
+
+@dataclass
+class Case:
+    label: str
+    run: Callable[[], object]  # solves the instance(s), returning the result
+    patches: dict = field(default_factory=dict)  # module globals to override
+
+
+def count_yields(func):
+    '''Wraps a successor generator, counting the states it yields'''
+    def wrapper(*args):
+        global generated
+        for item in func(*args):
+            generated += 1
+            yield item
+    return wrapper
+
+
+def count_calls(func):
+    '''Wraps a function returning a single successor state'''
+    def wrapper(*args):
+        global generated
+        generated += 1
+        return func(*args)
+    return wrapper
+
+
+class CountingGraph(dict):
+    '''Graph (node -> {direction: node}) counting the edges looked up'''
+
+    def __getitem__(self, node):
+        global generated
+        edges = super().__getitem__(node)
+        generated += len(edges)
+        return edges
+
+
+def load_solver(puzzle: str):
+    path = PUZZLES_DIR / puzzle / 'solve.py'
+    spec = importlib.util.spec_from_file_location(f'{puzzle}_solve', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, str(path.parent))
+    try:
+        with chdir(path.parent), redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(path.parent))
+    return module
+
+
+def upstairs_wheels_cases(mod):
+    rng = Random(SEED)
+    yield Case('start', lambda: mod.solve(mod.START_STATE))
+
+    starts = [
+        (tuple(rng.randrange(len(mod.BAR_POS_SEQUENCE)) for _ in range(mod.NUM_BARS)),
+         tuple(rng.randrange(mod.NUM_WHEEL_STATES) for _ in range(mod.NUM_WHEELS)))
+        for _ in range(10)
+    ]
+    yield Case('random x10', lambda: [mod.solve(s) for s in starts])
+
+    # one more wheel, each moving random pairs of bars
+    wheels = 6
+    wheel_bars = {
+        w: tuple(tuple(rng.sample(range(mod.NUM_BARS), 2)) for _ in range(2))
+        for w in range(wheels)
+    }
+    yield Case(
+        f'{wheels} wheels',
+        lambda: mod.solve((mod.START_BAR_IDXS, (0, ) * wheels)),
+        {'NUM_WHEELS': wheels, 'WHEEL_BARS': wheel_bars},
+    )
+
+
+def random_walk(state, neighbors, moves, rng):
+    '''Scrambles a state with random moves (keeping it solvable)'''
+    for _ in range(moves):
+        state, _ = rng.choice(list(neighbors(state)))
+    return state
+
+
+def concentric_circles_cases(mod):
+    rng = Random(SEED)
+    yield Case('start', lambda: mod.solve(mod.START_STATE))
+
+    starts = [random_walk(mod.START_STATE, mod.neighbors, 3, rng) for _ in range(3)]
+    yield Case('random x3', lambda: [mod.solve(s) for s in starts])
+
+
+def museum_square_numbers_cases(mod):
+    rng = Random(SEED)
+    yield Case('start', lambda: mod.solve(mod.START))
+
+    starts = [random_walk(mod.START, mod.neighbors, 20, rng) for _ in range(2)]
+    yield Case('random x2', lambda: [mod.solve(s) for s in starts])
+
+
+def fountain_cases(mod):
+    yield Case('start', lambda: mod.solve_all(mod.INIT_STATE))
+
+    starts = [
+        (jets, pos)
+        for jets in product(range(4), repeat=4)
+        for pos in range(4)
+    ]
+    yield Case(f'all x{len(starts)}', lambda: [mod.solve_all(s) for s in starts])
+
+
+def picture_swapping_cases(mod):
+    yield Case('start', lambda: mod.solve(mod.START))
+
+    starts = list(permutations(mod.START))
+    yield Case(f'all x{len(starts)}', lambda: [mod.solve(s) for s in starts])
+
+
+def kitchen_dumbwaiter_cases(mod):
+    yield Case('start', lambda: mod.solve(mod.START))
+
+    top = 20_000
+    yield Case(f'{top} floors', lambda: mod.solve(0), {'MAX': top, 'GOAL': top})
+
+
+def basement_water_cases(mod):
+    yield Case('start', lambda: mod.solve((0, 0, 8)))
+
+    capacities = (23, 37, 61, 120)
+    yield Case(
+        f'capacities {capacities}',
+        lambda: mod.solve((0, 0, 0, capacities[-1])),
+        {'CAPACITIES': capacities},
+    )
+
+
+def basement_graph_cases(mod):
+    with chdir(PUZZLES_DIR / 'basement_graph'):
+        graph = CountingGraph(mod.load_graph())
+    yield Case('start', lambda: mod.solve(graph, start=0, goal=28))
+
+    # square lattice of nodes, jumping two nodes in each direction
+    rng = Random(SEED)
+    size = 250
+    offsets = {
+        'R': (0, 2), 'DR': (2, 2), 'D': (2, 0), 'DL': (2, -2),
+        'L': (0, -2), 'UL': (-2, -2), 'U': (-2, 0), 'UR': (-2, 2),
+    }
+    lattice = CountingGraph()
+    for r in range(size):
+        for c in range(size):
+            lattice[r * size + c] = {
+                dir: (r + dr) * size + c + dc
+                for dir, (dr, dc) in offsets.items()
+                if 0 <= r + dr < size and 0 <= c + dc < size and rng.random() < 0.7
+            }
+    goal = size * size - 1
+    yield Case(f'{size}x{size} lattice', lambda: mod.solve(lattice, start=0, goal=goal))
+
+
+# generated layout with a 15 move solution
+BOUDOIR_8X8 = '''
+.QDDKKK.
+.Q..F...
+.BBBFLMM
+jjR..L..
+NORHHLEE
+NOA.C...
+P.ATCGGG
+PSSTCII.
+'''.strip()
+
+
+def boudoir_slides_cases(mod):
+    tiles = mod.parse_tiles(mod.string_to_grid(mod.START))
+    yield Case('start', lambda: mod.solve(tiles))
+
+    # the start board with one more empty column
+    grid = mod.string_to_grid(mod.START)
+    wide = mod.parse_tiles({(r, c + 1 if c else c): id for (r, c), id in grid.items()})
+    yield Case('6x7', lambda: mod.solve(wide), {'COLS': 7})
+
+    big = mod.parse_tiles(mod.string_to_grid(BOUDOIR_8X8))
+    yield Case('8x8', lambda: mod.solve(big, 8, 8))
+
+
+def magnet_ball_cases(mod):
+    with chdir(PUZZLES_DIR / 'magnet_ball'):
+        grid = mod.load_grid('grid.txt')
+    yield Case('start', lambda: mod.solve(dict(grid)))
+
+    # random walls inside a wall border (the ball slides off open edges),
+    # with the start and goal in opposite corners, redrawn until solvable
+    rng = Random(SEED)
+    size = 120
+    while True:
+        walls = {
+            (r, c): mod.Tile.WALL
+            if r in (0, size - 1) or c in (0, size - 1) or rng.random() < 0.25
+            else mod.Tile.EMPTY
+            for r in range(size)
+            for c in range(size)
+        }
+        walls[1, 1] = mod.Tile.START
+        walls[size - 2, size - 2] = mod.Tile.END
+        if mod.solve(dict(walls)) is not None:
+            break
+    yield Case(f'{size}x{size} random', lambda: mod.solve(dict(walls)))
+
+
+# puzzle -> (case generator, counted successor function, counts yields?)
+SOLVERS = {
+    'upstairs_wheels': (upstairs_wheels_cases, 'neighbors', True),
+    'concentric_circles': (concentric_circles_cases, 'neighbors', True),
+    'museum_square_numbers': (museum_square_numbers_cases, 'neighbors', True),
+    'fountain': (fountain_cases, 'move', False),
+    'picture_swapping': (picture_swapping_cases, 'swap', False),
+    'kitchen_dumbwaiter': (kitchen_dumbwaiter_cases, 'neighbors', True),
+    'basement_water': (basement_water_cases, 'neighbors', True),
+    'basement_graph': (basement_graph_cases, None, True),
+    'boudoir_slides': (boudoir_slides_cases, 'Board.neighbors', True),
+    'magnet_ball': (magnet_ball_cases, 'neighbors', True),
+}
+
+
+def solution_size(result):
+    '''Summarizes a result (a path or a list of results) as a single number'''
+    if result is None:
+        return None
+    if isinstance(result, list):
+        return sum(solution_size(r) or 0 for r in result)
+    return len(result)
+
+
+def run_case(mod, case: Case, repeats: int) -> dict:
+    global generated
+    saved = {name: getattr(mod, name) for name in case.patches}
+    for name, value in case.patches.items():
+        setattr(mod, name, value)
+
+    try:
+        best = float('inf')
+        for _ in range(repeats):
+            generated = 0
+            start = perf_counter()
+            result = case.run()
+            best = min(best, perf_counter() - start)
+        states = generated
+
+        tracemalloc.start()
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        for name, value in saved.items():
+            setattr(mod, name, value)
+
+    return {
+        'time': round(best, 6),
+        'peak_bytes': peak,
+        'states': states,
+        'states_per_sec': round(states / best) if best else None,
+        'solution': solution_size(result),
+    }
+
+
+def run_all(pattern: str, repeats: int) -> dict[str, dict]:
+    results = {}
+    for puzzle, (make_cases, counted, yields) in SOLVERS.items():
+        try:
+            mod = load_solver(puzzle)
+        except ImportError as exc:
+            print(f'{puzzle:<44} skipped ({exc})')
+            continue
+
+        if counted:
+            # counted may name a method (e.g. 'Board.neighbors')
+            *owners, name = counted.split('.')
+            owner = mod
+            for attr in owners:
+                owner = getattr(owner, attr)
+            func = getattr(owner, name)
+            setattr(owner, name, count_yields(func) if yields else count_calls(func))
+
+        for case in make_cases(mod):
+            name = f'{puzzle}/{case.label}'
+            if pattern not in name:
+                continue
+            results[name] = r = run_case(mod, case, repeats)
+            print(f'{name:<44} {r["time"]:>9.4f}s {r["peak_bytes"] >> 10:>9} KiB '
+                  f'{r["states"]:>10} states {r["states_per_sec"] or 0:>10}/s')
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict, tolerance: float) -> list[str]:
+    '''Returns a description of each regression'''
+    regressions = []
+    print()
+    for name, r in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f'{name:<44} new')
+            continue
+
+        notes = [f'{base["time"] / r["time"]:.2f}x speed' if r['time'] else '']
+        if r['time'] > base['time'] * (1 + tolerance) and r['time'] - base['time'] > NOISE:
+            regressions.append(f'{name}: slower ({base["time"]:.4f}s -> {r["time"]:.4f}s)')
+            notes.append('SLOWER')
+        if r['peak_bytes'] > base['peak_bytes'] * (1 + tolerance):
+            regressions.append(f'{name}: more memory ({base["peak_bytes"]} -> {r["peak_bytes"]} bytes)')
+            notes.append('MORE MEMORY')
+        if r['solution'] != base['solution']:
+            regressions.append(f'{name}: solution changed ({base["solution"]} -> {r["solution"]})')
+            notes.append('SOLUTION CHANGED')
+        if r['states'] != base['states']:
+            notes.append(f'states {base["states"]} -> {r["states"]}')
+        print(f'{name:<44} ' + ', '.join(notes))
+
+    return regressions
+
+
+def machine():
+    return f'{platform.python_implementation()} {platform.python_version()} on {platform.machine()}'
+
+
+def main():
+    # otherwise every solver would be skipped as failing to import
+    if importlib.util.find_spec('search') is None:
+        print(f'The search package is not importable, put {ROOT} on PYTHONPATH')
+        sys.exit(1)
+
+    def arg(flag, default, type=int):
+        return type(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    pattern = arg('-k', '', str)
+    repeats = arg('-r', REPEATS)
+    tolerance = arg('-t', TOLERANCE, float)
+
+    results = run_all(pattern, repeats)
+
+    if '--save' in sys.argv:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({'machine': machine(), 'results': results}, f, indent=2)
+        print(f'\nSaved baseline to {BASELINE_PATH}')
+        return
+
+    if not BASELINE_PATH.exists():
+        print('\nNo baseline yet (run with --save)')
+        return
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    if baseline['machine'] != machine():
+        print(f'\nWARNING: baseline was recorded with {baseline["machine"]}')
+
+    if regressions := compare(results, baseline, tolerance):
+        print('\nRegressions:')
+        for r in regressions:
+            print(' ', r)
+        sys.exit(1)
+    print('\nNo regressions')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
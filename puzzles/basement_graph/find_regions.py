@@ -1,7 +1,8 @@
 import json
 
 import cv2
-import numpy as np
+
+from vision import match_boxes
 
 ss = cv2.imread('ss.png', cv2.IMREAD_COLOR)
 template_rgba = cv2.imread('template.png', cv2.IMREAD_UNCHANGED)
@@ -18,18 +19,8 @@ result = cv2.matchTemplate(
 threshold = 0.93
 w, h = template_rgb.shape[1], template_rgb.shape[0]
 
-locations = np.where(result >= threshold)
-locations = list(zip(*locations[::-1]))
-
-matched = []
-occupied = np.zeros(ss.shape[:2], dtype=np.uint8)
-
-for pt in sorted(locations, key=lambda x: -result[x[1], x[0]]):
-    x, y = pt
-    roi = occupied[y:y + h, x:x + w]
-    if np.count_nonzero(roi) == 0:
-        matched.append((x, y))
-        occupied[y:y + h, x:x + w] = 1
+# best matches first, skipping any overlapping a better match
+matched = [(x, y) for x, y, _, _ in match_boxes(result, (w, h), threshold, iou_threshold=0)]
 
 for x, y in matched:
     cv2.rectangle(ss, (x, y), (x + w, y + h), (0, 255, 0), 2)
@@ -3,6 +3,8 @@ import math
 from collections import defaultdict
 from itertools import batched
 
+from search import bfs
+
 DIRNAMES = ['R', 'DR', 'D', 'DL', 'L', 'UL', 'U', 'UR']
 
 
@@ -18,7 +20,8 @@ def offset_to_dir_index(offset: tuple[int, int]):
     return int(((angle_deg + wedge_deg / 2) // wedge_deg)) % 8
 
 
-def main():
+def load_graph():
+    '''Returns the graph of possible moves (node -> direction -> node)'''
     with open('nodes.json') as f:
         nodes = {}
         for item in json.load(f):
@@ -48,7 +51,11 @@ def main():
             if jump_tar is not None:
                 jump_graph[src][dir] = jump_tar
 
-    solution = solve(jump_graph, start=0, goal=28)
+    return jump_graph
+
+
+def main():
+    solution = solve(load_graph(), start=0, goal=28)
     for i, v in enumerate(solution):
         print(v, end=' ')
         if not (i + 1) % 4:
@@ -57,16 +64,11 @@ def main():
 
 
 def solve(graph, start, goal):
-    q = [(start, tuple())]
-    visited = {start}
-    while q:
-        node, path = q.pop(0)
-        if node == goal:
-            return path
+    def neighbors(node):
         for dir, tar in graph[node].items():
-            if tar not in visited:
-                visited.add(tar)
-                q.append((tar, path + (dir, )))
+            yield tar, dir
+
+    return bfs(start, neighbors, lambda node: node == goal)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,7 @@
 from itertools import product
 
+from search import bfs
+
 CAPACITIES = (3, 5, 8)
 
 
@@ -18,26 +20,8 @@ def neighbors(state):
             yield tuple(new), (src, tar)
 
 
-def reconstruct_path(parent, state):
-    path = []
-    while entry := parent[state]:
-        state, move = entry
-        path.append(move)
-    return tuple(path[::-1])
-
-
 def solve(start):
-    parent = {start: None}
-    q = [start]
-    while q:
-        state = q.pop(0)
-        if solved(state):
-            return reconstruct_path(parent, state)
-
-        for n, move in neighbors(state):
-            if n not in parent:
-                parent[n] = state, move
-                q.append(n)
+    return bfs(start, neighbors, solved)
 
 
 start = (0, 0, 8)
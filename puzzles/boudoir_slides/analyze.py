@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# Exhaustive analysis of a layout's state space.
+#
+# Enumerates every state reachable from the start layout once, then computes
+# the number of moves to the goal from every state with a backward BFS from
+# all solved states (slides are reversible). States are the packed ints from
+# bitboard.Board. They're indexed with a minimal perfect hash, so the
+# per-state tables are flat arrays (one byte per distance) and queries are
+# O(1) lookups instead of separate BFS runs.
+#
+# Usage:
+#   ./analyze.py [layout file]    # defaults to START
+
+import sys
+from array import array
+from collections import deque
+from time import time
+
+from batch import read_layouts
+from bitboard import Board
+from solve import KEY_TILE_ID, START, display, parse_tiles, string_to_grid
+
+MASK64 = (1 << 64) - 1
+UNSOLVABLE = 0xff
+
+# average number of keys per perfect hash bucket
+KEYS_PER_BUCKET = 2
+
+
+def mix(key: int, seed: int) -> int:
+    '''64-bit integer hash (wider keys are hashed 64 bits at a time)'''
+    while key > MASK64:
+        seed = mix(key & MASK64, seed)
+        key >>= 64
+    h = (key * 0x9E3779B97F4A7C15 + (seed + 1) * 0xC2B2AE3D27D4EB4F) & MASK64
+    h ^= h >> 29
+    h = (h * 0xBF58476D1CE4E5B9) & MASK64
+    return h ^ h >> 32
+
+
+class PerfectHash:
+    '''Minimal perfect hash (hash and displace) of a set of ints onto
+    0..len(keys)-1. Keys hash to buckets, and each bucket stores the seed
+    which sends all of its keys to free slots (buckets with a single key store
+    their slot directly). The keys themselves are kept (in slot order) to
+    reject states outside the set, packed as 64-bit ints unless any is wider
+    (large boards), in which case they're kept in a list.
+    '''
+
+    DIRECT = 1 << 31  # flags a seed holding a slot index
+
+    def __init__(self, keys):
+        n = len(keys)
+        self.size = n
+        self.buckets = max(n // KEYS_PER_BUCKET, 1)
+        self.seeds = array('I', [0]) * self.buckets
+        if max(keys, default=0) <= MASK64:
+            self.keys = array('Q', [0]) * n
+        else:
+            self.keys = [0] * n
+
+        bucket_keys = [[] for _ in range(self.buckets)]
+        for key in keys:
+            bucket_keys[mix(key, -1) % self.buckets].append(key)
+
+        taken = bytearray(n)
+        free = 0  # lowest possibly free slot
+        # place the largest buckets first, while there are many free slots
+        for b in sorted(range(self.buckets), key=lambda b: -len(bucket_keys[b])):
+            bkeys = bucket_keys[b]
+            if len(bkeys) == 0:
+                break
+            if len(bkeys) == 1:
+                while taken[free]:
+                    free += 1
+                taken[free] = 1
+                self.seeds[b] = self.DIRECT | free
+                self.keys[free] = bkeys[0]
+                continue
+
+            seed = 0
+            while True:
+                slots = {mix(key, seed) % n for key in bkeys}
+                if len(slots) == len(bkeys) and not any(taken[s] for s in slots):
+                    break
+                seed += 1
+            self.seeds[b] = seed
+            for key in bkeys:
+                slot = mix(key, seed) % n
+                taken[slot] = 1
+                self.keys[slot] = key
+
+    def __getitem__(self, key: int) -> int:
+        seed = self.seeds[mix(key, -1) % self.buckets]
+        slot = seed ^ self.DIRECT if seed & self.DIRECT else mix(key, seed) % self.size
+        if self.keys[slot] != key:
+            raise KeyError(key)
+        return slot
+
+    def __contains__(self, key: int) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self):
+        return self.size
+
+    def key_bytes(self) -> int:
+        if isinstance(self.keys, array):
+            return self.keys.itemsize * self.size
+        return sys.getsizeof(self.keys) + sum(map(sys.getsizeof, self.keys))
+
+
+class StateSpace:
+    '''All states reachable from a start layout and their distances to the goal'''
+
+    def __init__(self, board: Board, start: int):
+        self.board = board
+        self.start = start
+
+        start_time = time()
+        states = self.reachable(start)
+        self.index = PerfectHash(states)
+        print(f'{time() - start_time:>5.2f}s  Indexed {len(states)} reachable states')
+
+        start_time = time()
+        self.distances = self.goal_distances(states)
+        print(f'{time() - start_time:>5.2f}s  Computed distances to goal')
+
+    def reachable(self, start: int) -> list[int]:
+        seen = {start}
+        q = deque([start])
+        while q:
+            state = q.popleft()
+            for n, _ in self.board.neighbors(state):
+                if n not in seen:
+                    seen.add(n)
+                    q.append(n)
+        return list(seen)
+
+    def goal_distances(self, states) -> bytearray:
+        '''Backward BFS from every solved state. Distances are single bytes,
+        so layouts needing more than UNSOLVABLE - 1 moves raise ValueError.'''
+        distances = bytearray([UNSOLVABLE]) * len(states)
+        q = deque()
+        for state in states:
+            if self.board.solved(state):
+                distances[self.index[state]] = 0
+                q.append(state)
+
+        while q:
+            state = q.popleft()
+            dist = distances[self.index[state]] + 1
+            if dist >= UNSOLVABLE:
+                raise ValueError(f'Layouts need over {UNSOLVABLE - 1} moves, too many for byte distances')
+            for n, _ in self.board.neighbors(state):
+                idx = self.index[n]
+                if distances[idx] == UNSOLVABLE:
+                    distances[idx] = dist
+                    q.append(n)
+        return distances
+
+    def distance(self, state: int) -> int | None:
+        '''Returns the number of moves needed to solve a state (None if
+        unsolvable)'''
+        dist = self.distances[self.index[state]]
+        return None if dist == UNSOLVABLE else dist
+
+    def hardest(self) -> tuple[list[int], int]:
+        '''Returns all solvable states needing the most moves, and that number'''
+        most = max((d for d in self.distances if d != UNSOLVABLE), default=0)
+        return [self.index.keys[i] for i, d in enumerate(self.distances) if d == most], most
+
+    def optimal_moves(self, state: int):
+        '''Yields (move, next state) for every move which is part of an
+        optimal solution'''
+        dist = self.distance(state)
+        if not dist:
+            return
+        for n, move in self.board.neighbors(state):
+            if self.distances[self.index[n]] == dist - 1:
+                yield move, n
+
+    def solve(self, state: int):
+        '''Returns an optimal solution in O(moves) lookups (None if unsolvable)'''
+        if self.distance(state) is None:
+            return None
+        moves = []
+        while self.distance(state):
+            move, state = next(self.optimal_moves(state))
+            moves.append(move)
+        return tuple(moves)
+
+    def count_optimal_solutions(self, state: int) -> int:
+        '''Counts the distinct optimal move sequences solving a state'''
+        counts = {}
+
+        # states reachable along optimal moves, in order of increasing distance
+        layers = [[state]]
+        while self.distance(layers[-1][0]):
+            layers.append(list({n for s in layers[-1] for _, n in self.optimal_moves(s)}))
+
+        for layer in reversed(layers):
+            for s in layer:
+                counts[s] = sum(counts[n] for _, n in self.optimal_moves(s)) or 1
+        return counts[state]
+
+
+def main():
+    layout = START
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            layout = next(read_layouts(f))
+
+    lines = layout.splitlines()
+    rows, cols = len(lines), max(map(len, lines))
+    tiles = parse_tiles(string_to_grid(layout))
+    board = Board(tiles, rows, cols, KEY_TILE_ID)
+    start = board.encode(tiles)
+
+    space = StateSpace(board, start)
+    dist = space.distance(start)
+    if dist is None:
+        print('\nThe start layout is unsolvable')
+        return
+
+    print(f'\nStart layout: {dist} moves, '
+          f'{space.count_optimal_solutions(start)} optimal solutions')
+
+    hardest, most = space.hardest()
+    print(f'Hardest reachable layouts: {most} moves ({len(hardest)} layouts)\n')
+    display(board.decode(hardest[0]), rows=rows, cols=cols)
+    print('Optimal solution:', ', '.join(map(board.move_name, space.solve(hardest[0]))))
+    print('Optimal solutions:', space.count_optimal_solutions(hardest[0]))
+
+    solvable = sum(d != UNSOLVABLE for d in space.distances)
+    print(f'\n{solvable}/{len(space.index)} reachable layouts are solvable, '
+          f'using {len(space.distances) + space.index.seeds.itemsize * space.index.buckets} '
+          f'bytes of tables (plus {space.index.key_bytes()} bytes of keys)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Solves many layouts from a file across a process pool.
+#
+# Layouts use the same format as START (one board per block, blocks separated
+# by blank lines) and may be of any size. Each result is written as a JSON line
+# (in input order) with the move list and solve stats.
+#
+# Usage:
+#   ./batch.py <layouts file> [-o <output file>] [-j <workers>] [-k <key tile id>]
+
+import json
+import os
+import sys
+from multiprocessing import Pool
+from time import perf_counter, time
+
+from bitboard import Board
+from search import bfs
+from solve import KEY_TILE_ID, parse_tiles, string_to_grid
+
+# layouts sent to a worker at a time
+CHUNK_SIZE = 4
+
+
+def read_layouts(f):
+    '''Yields each layout (block of non-empty lines) in a file'''
+    block = []
+    for line in f:
+        if line.strip():
+            block.append(line.strip())
+        elif block:
+            yield '\n'.join(block)
+            block = []
+    if block:
+        yield '\n'.join(block)
+
+
+def solve_layout(task) -> dict:
+    index, layout, key_id = task
+    result = {'index': index, 'layout': layout}
+
+    lines = layout.splitlines()
+    rows, cols = len(lines), max(map(len, lines))
+    tiles = parse_tiles(string_to_grid(layout))
+    if not any(t.id == key_id for t in tiles):
+        result['error'] = f'no key tile {key_id!r}'
+        return result
+
+    board = Board(tiles, rows, cols, key_id)
+
+    expanded = 0
+
+    def neighbors(state):
+        nonlocal expanded
+        expanded += 1
+        return board.neighbors(state)
+
+    start = perf_counter()
+    moves = bfs(board.encode(tiles), neighbors, board.solved)
+    elapsed = perf_counter() - start
+
+    result.update({
+        'rows': rows,
+        'cols': cols,
+        'tiles': len(tiles),
+        'moves': None if moves is None else [board.move_name(m) for m in moves],
+        'length': None if moves is None else len(moves),
+        'expanded': expanded,
+        'time': round(elapsed, 6),
+    })
+    return result
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1].startswith('-'):
+        print(f'usage: {sys.argv[0]} <layouts file> [-o <output file>] [-j <workers>] [-k <key tile id>]')
+        sys.exit(1)
+
+    def arg(flag, default):
+        return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+    workers = int(arg('-j', os.cpu_count()))
+    key_id = arg('-k', KEY_TILE_ID)
+    out = open(arg('-o', None), 'w') if '-o' in sys.argv else sys.stdout
+
+    start_time = time()
+    solved = total = 0
+
+    with open(sys.argv[1]) as f, Pool(workers) as pool:
+        tasks = ((i, layout, key_id) for i, layout in enumerate(read_layouts(f)))
+        for result in pool.imap(solve_layout, tasks, CHUNK_SIZE):
+            out.write(json.dumps(result) + '\n')
+            total += 1
+            solved += result.get('moves') is not None
+
+    if out is not sys.stdout:
+        out.close()
+
+    print(f'Solved {solved}/{total} layouts in {time() - start_time:.1f}s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
@@ -0,0 +1,85 @@
+# Bitboard encoding of sliding tile layouts.
+#
+# Cell (r, c) is bit r * cols + c of an occupancy mask. Each tile only moves
+# along its lane (its row if horizontal, its column if vertical), so a state is
+# just an int holding every tile's offset along its lane (bits_per_tile bits
+# each). Every tile's mask at every offset is precomputed, so moves are
+# generated with a few bitwise ands.
+
+
+class Board:
+
+    def __init__(self, tiles, rows: int, cols: int, key_id: str):
+        self.tiles = tuple(tiles)
+        self.rows = rows
+        self.cols = cols
+        self.bits_per_tile = max(max(rows, cols) - 1, 1).bit_length()
+        self.offset_mask = (1 << self.bits_per_tile) - 1
+
+        # tile index -> occupancy mask at each offset along its lane
+        self.masks = tuple(self.lane_masks(t) for t in self.tiles)
+
+        self.key = next(i for i, t in enumerate(self.tiles) if t.id == key_id)
+        right_edge = sum(1 << (r * cols + cols - 1) for r in range(rows))
+        self.key_goals = tuple(bool(m & right_edge) for m in self.masks[self.key])
+
+    def lane_masks(self, tile):
+        r, c = tile.pos
+        if tile.orientation == 'h':
+            row = (1 << tile.length) - 1
+            return tuple(row << (r * self.cols + p) for p in range(self.cols - tile.length + 1))
+        col = sum(1 << (i * self.cols + c) for i in range(tile.length))
+        return tuple(col << (p * self.cols) for p in range(self.rows - tile.length + 1))
+
+    def encode(self, tiles) -> int:
+        positions = {t.id: t.pos for t in tiles}
+        state = 0
+        for i, t in enumerate(self.tiles):
+            r, c = positions[t.id]
+            state |= (c if t.orientation == 'h' else r) << (i * self.bits_per_tile)
+        return state
+
+    def decode(self, state: int) -> list:
+        tiles = []
+        for i, t in enumerate(self.tiles):
+            p = self.offset(state, i)
+            pos = (t.pos[0], p) if t.orientation == 'h' else (p, t.pos[1])
+            tiles.append(type(t)(t.id, pos, t.orientation, t.length))
+        return tiles
+
+    def offset(self, state: int, i: int) -> int:
+        return state >> (i * self.bits_per_tile) & self.offset_mask
+
+    def occupancy(self, state: int) -> int:
+        occupied = 0
+        for i, masks in enumerate(self.masks):
+            occupied |= masks[state >> (i * self.bits_per_tile) & self.offset_mask]
+        return occupied
+
+    def neighbors(self, state: int):
+        '''Yields (state, (tile index, distance)) for every possible slide'''
+        occupied = self.occupancy(state)
+        for i, masks in enumerate(self.masks):
+            shift = i * self.bits_per_tile
+            p = state >> shift & self.offset_mask
+            others = occupied ^ masks[p]
+            base = state & ~(self.offset_mask << shift)
+
+            for step in (1, -1):
+                q = p + step
+                while 0 <= q < len(masks) and not masks[q] & others:
+                    yield base | q << shift, (i, q - p)
+                    q += step
+
+    def solved(self, state: int) -> bool:
+        return self.key_goals[self.offset(state, self.key)]
+
+    def move_name(self, move) -> str:
+        '''Formats a move as "<tile_id> <left|right|up|down> x <amount>"'''
+        i, dist = move
+        tile = self.tiles[i]
+        if tile.orientation == 'v':
+            dir = 'down' if dist > 0 else 'up'
+        else:
+            dir = 'right' if dist > 0 else 'left'
+        return f'{tile.id} {dir} x {abs(dist)}'
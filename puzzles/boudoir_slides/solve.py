@@ -3,6 +3,9 @@ from collections import defaultdict
 from dataclasses import dataclass
 from typing import Literal
 
+from bitboard import Board
+from search import bfs
+
 START = '''
 .C.iii
 AC.EF.
@@ -47,52 +50,11 @@ class Tile:
             for i in range(self.length)
         }
 
-    def neighbors(self, other_tiles):
-        '''Returns moved versions of this tile (in both possible directions).
-        Only returns moves which keep the tile within the grid boundaries.
-        '''
 
-        offsets = [
-            (
-                (self.offset[0], self.offset[1]),
-                'down' if self.orientation == 'v' else 'right'
-            ),
-            (
-                (-self.offset[0], -self.offset[1]),
-                'up' if self.orientation == 'v' else 'left'
-            ),
-        ]
-
-        other_spots = {s for t in other_tiles for s in t.spots}
-
-        # try moving in both directions
-        for (roff, coff), move in offsets:
-            # try moving each piece every possible distance
-            pos = self.pos
-            dist = 1
-            while True:
-                newpos = (pos[0] + roff, pos[1] + coff)
-                newtile = Tile(self.id, newpos, self.orientation, self.length)
-
-                # check for out of bounds
-                if not all(
-                    0 <= r < ROWS and 0 <= c < COLS for r, c in newtile.spots
-                ):
-                    break
-
-                # check for overlap with other tiles
-                if newtile.spots & other_spots:
-                    break
-
-                yield newtile, f'{self.id} {move} x {dist}'
-                pos = newpos
-                dist += 1
-
-
-def display(all_tiles: list[Tile] | frozenset[Tile], highlight=None):
+def display(all_tiles: list[Tile] | frozenset[Tile], highlight=None, rows=ROWS, cols=COLS):
     grid = {p: t.id for t in all_tiles for p in t.spots}
-    for r in range(ROWS):
-        for c in range(COLS):
+    for r in range(rows):
+        for c in range(cols):
             out = grid.get((r, c), '.')
             if out == highlight:
                 out = f'\033[91;1m{out}\033[0m'
@@ -126,32 +88,12 @@ def parse_tiles(grid):
     ]
 
 
-def neighbors(all_tiles: list[Tile] | frozenset[Tile]):
-    '''Returns all valid neighboring states for this tile'''
-
-    for tile in all_tiles:
-        other_tiles = [t for t in all_tiles if t != tile]
-        for n, move in tile.neighbors(other_tiles):
-            yield frozenset(other_tiles + [n]), move
-
-
-def solved(tiles):
-    key_tile = next(t for t in tiles if t.id == KEY_TILE_ID)
-    return max(c for r, c in key_tile.spots) == COLS - 1
-
-
-def solve(tiles):
-    start = frozenset(tiles)
-    q = [(start, tuple())]
-    visited = {start}
-    while q:
-        tiles, moves = q.pop(0)
-        if solved(tiles):
-            return moves
-        for ntiles, move in neighbors(tiles):
-            if ntiles not in visited:
-                visited.add(ntiles)
-                q.append((ntiles, moves + (move, )))
+def solve(tiles, rows=None, cols=None):
+    '''Returns the shortest list of moves sliding the key tile to the right
+    edge (rows and cols default to ROWS and COLS)'''
+    board = Board(tiles, rows or ROWS, cols or COLS, KEY_TILE_ID)
+    if (moves := bfs(board.encode(tiles), board.neighbors, board.solved)) is not None:
+        return tuple(map(board.move_name, moves))
 
 
 def move(tiles, move: str):
@@ -20,6 +20,8 @@ after rotating blue cw:
     red[4] = blue[1]
 '''
 
+from search import bfs
+
 RED_RING = 'g.b..r'
 GREEN_RING = '...g.b'
 BLUE_RING = '..gb.r'
@@ -61,17 +63,7 @@ def neighbors(state):
 
 
 def solve(state):
-    visited = {state}
-    q = [(state, tuple())]
-    while q:
-        state, path = q.pop(0)
-        if solved(state):
-            return path
-
-        for n, move in neighbors(state):
-            if n not in visited:
-                visited.add(n)
-                q.append((n, path + (move, )))
+    return bfs(state, neighbors, solved)
 
 
 def main():
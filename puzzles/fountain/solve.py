@@ -1,3 +1,5 @@
+from search import bfs, bfs_all
+
 # Each jet can be in one of four states
 LEFT, MID_RIGHT, RIGHT, MID_LEFT = range(4)
 
@@ -21,36 +23,17 @@ def solved(state):
     return tuple(JET_STATES[s] for s in state[0]) == (2, 1, 0, 2)
 
 
+def neighbors(state):
+    for dir in (-1, 1):
+        yield move(state, dir), dir
+
+
 def solve(state):
-    q = [(state, tuple())]
-    visited = {state}
-    while q:
-        state, path = q.pop(0)
-        if solved(state):
-            return path
-        for dir in (-1, 1):
-            nstate = move(state, dir)
-            if nstate not in visited:
-                visited.add(nstate)
-                q.append((nstate, path + (dir, )))
+    return bfs(state, neighbors, solved)
 
 
 def solve_all(state):
-    solutions = []
-    q = [(state, tuple())]
-    visited = {state}
-    while q:
-        state, path = q.pop(0)
-        if solutions and len(path) > len(solutions[0][0]):
-            continue
-        if solved(state):
-            solutions.append((path, state))
-        for dir in (-1, 1):
-            nstate = move(state, dir)
-            if nstate not in visited:
-                visited.add(nstate)
-                q.append((nstate, path + (dir, )))
-    return solutions
+    return bfs_all(state, neighbors, solved)
 
 
 solutions = solve_all(INIT_STATE)
@@ -1,5 +1,7 @@
 from itertools import batched, pairwise
 
+from search import bfs
+
 # Starting position
 START = 4
 GOAL = 11
@@ -19,17 +21,9 @@ def neighbors(p):
 
 
 def solve(start):
-    visited = {start}
-    q = [(start, (start, ))]
-    while q:
-        p, path = q.pop(0)
-        if p == GOAL:
-            return path
-
-        for n in neighbors(p):
-            if n not in visited:
-                visited.add(n)
-                q.append((n, path + (n, )))
+    # each move is the new position, so the path lists every position
+    moves = bfs(start, lambda p: ((n, n) for n in neighbors(p)), lambda p: p == GOAL)
+    return None if moves is None else (start, ) + moves
 
 
 def format_solution(path):
@@ -4,6 +4,8 @@ from itertools import batched, pairwise
 import cv2
 import numpy as np
 
+from search import bfs
+
 rows, cols = 20, 25
 
 
@@ -68,19 +70,11 @@ def find_accessible_from(r, c):
 def solve(grid: dict[tuple[int, int], str]):
     start = next(p for p, ch in grid.items() if ch == Tile.START)
     grid[start] = Tile.EMPTY
-    goals = [p for p, ch in grid.items() if ch == Tile.END]
-    visited = set()
-
-    q = [(start, (start, ))]
-    while q:
-        p, path = q.pop(0)
-        if p in goals:
-            return path
-
-        for n in neighbors(grid, p):
-            if n not in visited:
-                visited.add(n)
-                q.append((n, path + (n, )))
+    goals = {p for p, ch in grid.items() if ch == Tile.END}
+
+    # each move is the new position, so the path lists every position
+    moves = bfs(start, lambda p: ((n, n) for n in neighbors(grid, p)), lambda p: p in goals)
+    return None if moves is None else (start, ) + moves
 
 
 def neighbors(grid, pos):
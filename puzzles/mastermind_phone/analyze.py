@@ -1,15 +1,19 @@
 import os
+import queue
 import subprocess
 import sys
+import threading
 import time
 
 import cv2
 import mss
 import numpy as np
 from solve import create_guesser, string_to_response
+from vision import match_boxes
 
 ENABLE_POPUP_NOTIFICATIONS = '-n' in sys.argv
 SHOW_VIEW = '-v' in sys.argv
+TRACK_LIGHTS = '-m' not in sys.argv
 
 INCORRECT = '0'
 CORRECT = '1'
@@ -25,6 +29,31 @@ PERCENT_MATCH = 0.90
 # brightness diff from 0-255 (0 = exact match, 255 = include all)
 MATCH_THRESHOLD = 40
 
+# minimum template match score (normalized correlation) of a light
+TEMPLATE_THRESHOLD = 0.8
+
+# fraction of each light's width/height (around its centre) sampled when
+# tracking lights
+SAMPLE_FRACTION = 0.5
+
+# tracked lights further than this (BGR distance) from every known light
+# colour, or not this much closer to one than to the next, fall back to
+# template matching
+MAX_COLOR_DISTANCE = 40
+MIN_CONFIDENCE = 0.5
+
+# weight of each new sample in the learned light colours
+COLOR_LEARNING_RATE = 0.1
+
+# frames buffered between the capture and decode threads
+FRAME_BUFFER_SIZE = 8
+
+# seconds between frame rate/drop reports
+STATS_INTERVAL = 10
+
+# seconds the lights are ignored for after solving
+SOLVED_PAUSE = 10
+
 
 class State:
     '''A state machine to extract meaning from flashing lights'''
@@ -124,65 +153,42 @@ class State:
             return None
 
 
-def boxes_iou(boxA, boxB):
-    """Compute Intersection over Union (IoU) of two boxes."""
-    xA = max(boxA[0], boxB[0])
-    yA = max(boxA[1], boxB[1])
-    xB = min(boxA[0] + boxA[2], boxB[0] + boxB[2])
-    yB = min(boxA[1] + boxA[3], boxB[1] + boxB[3])
-
-    interW = max(0, xB - xA)
-    interH = max(0, yB - yA)
-    interArea = interW * interH
-
-    areaA = boxA[2] * boxA[3]
-    areaB = boxB[2] * boxB[3]
-    unionArea = areaA + areaB - interArea
-
-    if unionArea == 0:
-        return 0
-    return interArea / unionArea
+def load_template(template_path):
+    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+    assert template is not None, f'Failed to load {template_path}'
+    return template
 
 
 def non_overlapping_template_match(
-    image, template_path, threshold=0.8, iou_threshold=0.1
+    image, template, threshold=TEMPLATE_THRESHOLD, iou_threshold=0.1, result=None
 ):
-    """Return a non-overlapping list of match bounding boxes."""
-    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
-    assert template is not None, f'Failed to load {template_path}'
+    """Return a non-overlapping list of match bounding boxes. The template may
+    be a path or a loaded grayscale image, and result an optional buffer for
+    the match scores."""
+    if isinstance(template, str):
+        template = load_template(template)
 
     h, w = template.shape[:2]
-    result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
-    matches = []
-
-    # Get all potential matches above threshold
-    locations = np.where(result >= threshold)
-    candidates = list(zip(locations[1], locations[0]))  # (x, y)
+    result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED, result=result)
+    return match_boxes(result, (w, h), threshold, iou_threshold)
 
-    # Sort candidates by match score (descending)
-    scores = result[locations]
-    sorted_candidates = sorted(zip(candidates, scores), key=lambda x: -x[1])
-
-    for (x, y), score in sorted_candidates:
-        box = (x, y, w, h)
-        if all(
-            boxes_iou(box, existing) < iou_threshold for existing in matches
-        ):
-            matches.append(box)
 
-    return matches
+TEMPLATE_PATHS = {
+    CORRECT: 'template_correct.png',
+    INCORRECT: 'template_incorrect.png',
+}
 
 
-def find_response_matches(image):
-    correct_matches = non_overlapping_template_match(
-        image, 'template_correct.png'
-    )
-    incorrect_matches = non_overlapping_template_match(
-        image, 'template_incorrect.png'
-    )
-
-    matches = [(m, CORRECT) for m in correct_matches]
-    matches += [(m, INCORRECT) for m in incorrect_matches]
+def find_response_matches(image, templates=TEMPLATE_PATHS, results=None):
+    '''Matches every template (status -> template or path), optionally
+    reusing result buffers (status -> buffer)'''
+    matches = []
+    for status, template in templates.items():
+        result = results and results[status]
+        matches += [
+            (m, status) for m in non_overlapping_template_match(
+                image, template, threshold=TEMPLATE_THRESHOLD, result=result)
+        ]
     return sorted(matches)
 
 
@@ -202,23 +208,169 @@ def decode_matches(matches, light_regions: list):
     return ''.join(status for _, status in matches).ljust(4, 'x')
 
 
+class LightTracker:
+    '''Classifies lights at known regions from their mean colour (in the
+    diff from the reference frame), instead of template matching the whole
+    frame. The colour of each status (off/correct/incorrect) is learned from
+    frames classified by template matching.'''
+
+    def __init__(self, light_regions: list):
+        self.light_regions = light_regions
+
+        # the same size window around the centre of every light, so all
+        # lights are sampled with one gather
+        w = max(int(min(w for _, _, w, _ in light_regions) * SAMPLE_FRACTION), 1)
+        h = max(int(min(h for _, _, _, h in light_regions) * SAMPLE_FRACTION), 1)
+        self.ys = np.array([y + (rh - h) // 2 for _, y, _, rh in light_regions])[:, None] + np.arange(h)
+        self.xs = np.array([x + (rw - w) // 2 for x, _, rw, _ in light_regions])[:, None] + np.arange(w)
+
+        # (light, status) -> mean BGR colour (lighting differs between lights)
+        self.colors = {}
+
+    def sample(self, diff) -> np.ndarray:
+        '''Returns the mean colour of each light'''
+        return diff[self.ys[:, :, None], self.xs[:, None, :]].mean(axis=(1, 2))
+
+    def learn(self, diff, result: str):
+        for key, color in zip(enumerate(result), self.sample(diff)):
+            known = self.colors.get(key)
+            self.colors[key] = color if known is None else (
+                known + COLOR_LEARNING_RATE * (color - known))
+
+    def classify(self, diff) -> str | None:
+        '''Returns the lights' statuses, or None unless every light is
+        confidently close to one of its learned colours'''
+        result = ''
+        for i, color in enumerate(self.sample(diff)):
+            statuses = [s for light, s in self.colors if light == i]
+            if not statuses:
+                return None
+            distances = np.linalg.norm(
+                np.array([self.colors[i, s] for s in statuses]) - color, axis=1)
+
+            order = np.argsort(distances)
+            nearest = distances[order[0]]
+            if nearest > MAX_COLOR_DISTANCE:
+                return None
+            if len(order) > 1 and 1 - nearest / max(distances[order[1]], 1e-9) < MIN_CONFIDENCE:
+                return None
+            result += statuses[order[0]]
+        return result
+
+
 def grab_screen_region(region):
     '''
     Capture a specific region (x, y, width, height) of the primary monitor.
     region: (x, y, width, height) relative to the primary monitor.
     '''
+    with mss.mss() as sct:
+        return grab(sct, absolute_region(sct.monitors[MONITOR_ID], region))
+
+
+def primary_monitor() -> dict:
     with mss.mss() as sct:
         # index 1 is always the primary monitor
-        monitor = sct.monitors[MONITOR_ID]
-        region_abs = {
-            "top": monitor["top"] + region['top'],
-            "left": monitor["left"] + region['left'],
-            "width": region['width'],
-            "height": region['height']
+        return sct.monitors[MONITOR_ID]
+
+
+def absolute_region(monitor, region):
+    return {
+        "top": monitor["top"] + region['top'],
+        "left": monitor["left"] + region['left'],
+        "width": region['width'],
+        "height": region['height']
+    }
+
+
+def grab(sct, region_abs, dst=None):
+    screenshot = sct.grab(region_abs)
+    return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_BGRA2BGR, dst=dst)
+
+
+class Pipeline:
+    '''Matches the response lights in frames captured from the screen region.
+    Templates are loaded once, and every frame is processed in buffers
+    allocated per region (not per frame).
+
+    Once four lights have been matched, their regions are stored and (when
+    tracking) later frames are classified by a LightTracker, only template
+    matching frames it isn't confident about.'''
+
+    def __init__(self, region, subtractive_frame, templates=TEMPLATE_PATHS, capture=True):
+        self.templates = {
+            status: load_template(path) if isinstance(path, str) else path
+            for status, path in templates.items()
+        }
+        self.subtractive_frame = subtractive_frame
+        self.track = TRACK_LIGHTS
+        self.tracked_frames = 0
+        self.matched_frames = 0
+        # screen position of the region to capture (None when frames come
+        # from elsewhere, e.g. videos)
+        self.monitor = primary_monitor() if capture else None
+        self.set_region(region)
+
+    def set_region(self, region):
+        self.region = region
+        self.region_abs = absolute_region(self.monitor, region) if self.monitor else None
+        self.light_regions = []
+        self.tracker = None
+        x, y, w, h = [region[v] for v in ['left', 'top', 'width', 'height']]
+
+        # a missing (or too small) reference frame leaves the capture as is
+        cropped = self.subtractive_frame[y:y + h, x:x + w]
+        if cropped.shape[:2] != (h, w):
+            cropped = np.zeros((h, w, 3), np.uint8)
+        self.cropped_subtractive_frame = np.ascontiguousarray(cropped)
+
+        self.shape = (h, w, 3)
+        self.diff = np.empty((h, w, 3), np.uint8)
+        self.diff_gray = np.empty((h, w), np.uint8)
+        self.black = np.empty((h, w), np.uint8)
+        self.results = {
+            status: np.empty((h - t.shape[0] + 1, w - t.shape[1] + 1), np.float32)
+            for status, t in self.templates.items()
         }
-        screenshot = sct.grab(region_abs)
-        img = np.array(screenshot)
-        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+
+    def set_reference(self, subtractive_frame):
+        self.subtractive_frame = subtractive_frame
+        self.set_region(self.region)
+
+    def process(self, frame):
+        '''Returns (diff_gray, matches, result, percent_black) for a captured
+        frame, where result is the decoded lights. The returned diff is reused
+        by the next call.'''
+        cv2.absdiff(frame, self.cropped_subtractive_frame, dst=self.diff)
+        cv2.cvtColor(self.diff, cv2.COLOR_BGR2GRAY, dst=self.diff_gray)
+
+        result = self.tracker.classify(self.diff) if self.tracker else None
+        if result is None:
+            matches = find_response_matches(self.diff_gray, self.templates, self.results)
+
+            # when 4 lights are visible, save their regions
+            if len(matches) == 4:
+                self.light_regions = [region for region, _ in matches]
+                if self.track and not self.tracker:
+                    self.tracker = LightTracker(self.light_regions)
+
+            # decode lights from regions (if available)
+            result = decode_matches(matches, self.light_regions)
+            if self.tracker:
+                self.tracker.learn(self.diff, result)
+            self.matched_frames += 1
+        else:
+            matches = [
+                (region, status) for region, status in zip(self.light_regions, result)
+                if status != 'x'
+            ]
+            self.tracked_frames += 1
+
+        # pixels below MATCH_THRESHOLD become 255
+        cv2.threshold(
+            self.diff_gray, MATCH_THRESHOLD - 1, 255, cv2.THRESH_BINARY_INV, dst=self.black
+        )
+        percent_black = cv2.countNonZero(self.black) / self.black.size
+        return self.diff_gray, matches, result, percent_black
 
 
 def select_screen_region():
@@ -243,52 +395,146 @@ def notify(message: str):
         subprocess.run(['notify-send', message])
 
 
-def main():
-    print('Pass -n to show popup notifications')
-    print('Pass -v to show live opencv view')
+class FrameRing:
+    '''Bounded buffer of timestamped frames between the capture thread and the
+    decode thread. Frames are captured into a fixed set of slots, which the
+    decoder releases once done. When every slot is waiting to be decoded, the
+    oldest frame is dropped (or with drop=False, capture waits instead).'''
+
+    def __init__(self, size=FRAME_BUFFER_SIZE, drop=True):
+        self.free = queue.Queue()
+        for _ in range(size):
+            self.free.put(np.empty(0, np.uint8))
+        self.filled = queue.Queue()
+        self.drop = drop
+        self.captured = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def acquire(self, shape) -> np.ndarray:
+        '''Returns a slot to capture a frame of the given shape into'''
+        try:
+            slot = self.free.get(block=not self.drop)
+        except queue.Empty:
+            try:
+                _, _, slot = self.filled.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                # the decoder has just taken the last frame
+                slot = self.free.get()
+        if slot.shape != shape:
+            slot = np.empty(shape, np.uint8)
+        return slot
+
+    def put(self, timestamp: float, slot: np.ndarray):
+        self.captured += 1
+        self.filled.put((timestamp, self.captured, slot))
+        self.max_depth = max(self.max_depth, self.filled.qsize())
+
+    def get(self, timeout=None) -> tuple[float, int, np.ndarray] | None:
+        '''Returns the next (timestamp, frame number, frame), raising
+        queue.Empty on timeout (or None once closed)'''
+        return self.filled.get(timeout=timeout)
+
+    def close(self):
+        '''Marks the end of the frames (once the decoder has taken the rest)'''
+        self.filled.put(None)
+
+    def release(self, slot: np.ndarray):
+        self.free.put(slot)
+
+    def depth(self) -> int:
+        return self.filled.qsize()
+
+
+def capture_frames(pipeline, ring: FrameRing, stop: threading.Event):
+    '''Captures the pipeline's region into the ring until stopped'''
+    # mss grabbers can't be shared between threads
+    with mss.mss() as sct:
+        while not stop.is_set():
+            region_abs = pipeline.region_abs
+            slot = ring.acquire((region_abs['height'], region_abs['width'], 3))
+            grab(sct, region_abs, dst=slot)
+            ring.put(time.time(), slot)
+
+
+class Decoder:
+    '''Decodes frames into lights and feeds them to the state machine.
+    Responses (and the first guess prompt) are passed to the guess thread as
+    events, so decoding never waits on the guesser.'''
+
+    def __init__(self, pipeline, events: queue.Queue):
+        self.pipeline = pipeline
+        self.events = events
+        self.state = State(verbose=False)
+        self.decoded = 0
+        self.prompted = False  # whether the first guess has been requested
+        self.paused_until = 0.0
+        # functions run between frames (pipeline changes from the main thread)
+        self.control = queue.SimpleQueue()
+        # last decoded (frame, diff_gray, matches, percent_black) for the view
+        self.view = None
+        self.view_lock = threading.Lock()
+
+    def decode(self, timestamp: float, frame) -> str | None:
+        '''Decodes a frame, returning the lights (None if the frame was
+        skipped)'''
+        while not self.control.empty():
+            self.control.get()()
+        if timestamp < self.paused_until or frame.shape != self.pipeline.shape:
+            return None
 
-    if SHOW_VIEW in sys.argv:
-        print(
-            'Press "f" when all lights are off to save a reference frame (ss.jpg)'
-        )
-        print('Press "r" to select the region containing lights')
+        diff_gray, matches, result, percent_black = self.pipeline.process(frame)
+        self.decoded += 1
 
-    # relative coords (to primary monitor)
-    region = {'left': 1296, 'top': 216, 'width': 636, 'height': 252}
+        # update state machine, and retrieve any emitted response
+        if response := self.state.update(result, int(timestamp * 1000)):
+            self.events.put(('response', response))
+            if response == 'cccc':
+                self.state = State(verbose=False)
+                self.prompted = False
+                self.paused_until = timestamp + SOLVED_PAUSE
 
-    state = State(verbose=False)
-    light_regions = []
+        # first guess
+        elif not self.prompted and self.state.history[-1] == 'xxxx' and percent_black > PERCENT_MATCH:
+            self.events.put(('first guess', None))
+            self.prompted = True
 
-    if os.path.exists('ss.jpg'):
-        subtractive_frame = cv2.imread('ss.jpg')
-    else:
-        print('Subtractive frame not found')
-        subtractive_frame = np.zeros([0, 0])
+        if SHOW_VIEW:
+            with self.view_lock:
+                self.view = (frame.copy(), diff_gray.copy(), matches, percent_black)
+        return result
+
+    def run(self, ring: FrameRing, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                item = ring.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            timestamp, _, frame = item
+            try:
+                self.decode(timestamp, frame)
+            finally:
+                ring.release(frame)
+
+
+def suggest_guesses(events: queue.Queue, stop: threading.Event):
+    '''Adds responses to the guesser and suggests the next guesses. This is
+    the only thread using the guesser.'''
 
     # create solver objects to generate guesses and deductions
     guesser = create_guesser()
     notifications = 0
 
-    while True:
-        frame = grab_screen_region(region)
-        x, y, w, h = [region[v] for v in ['left', 'top', 'width', 'height']]
-        cropped_subtractive_frame = subtractive_frame[y:y + h, x:x + w]
-        diff = cv2.absdiff(frame, cropped_subtractive_frame)
-        diff_gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-        matches = find_response_matches(diff_gray)
-
-        total_pixels = (diff_gray.shape[0] * diff_gray.shape[1])
-        percent_black = np.sum(diff_gray < MATCH_THRESHOLD) / total_pixels
+    while not stop.is_set():
+        try:
+            event, response = events.get(timeout=0.1)
+        except queue.Empty:
+            continue
 
-        # when 4 lights are visible, save their regions
-        if len(matches) == 4:
-            light_regions = [region for region, _ in matches]
-
-        # decode lights from regions (if available)
-        result = decode_matches(matches, light_regions)
-
-        # update state machine, and retrieve any emitted response
-        if response := state.update(result, int(time.time() * 1000)):
+        if event == 'response':
 
             # add guess/response to knowledge base
             last_guess = guesser.consume_best_guess()
@@ -300,8 +546,6 @@ def main():
                 notify('Solved, congrats! 🥳')
                 # reset guesser
                 guesser = create_guesser()
-                state = State(verbose=False)
-                time.sleep(10)
                 notifications = 0
             else:
                 new_guess = guesser.peek_best_guess()
@@ -319,14 +563,7 @@ def main():
                 notify(text)
                 notifications += 1
 
-        # first guess
-        elif all(
-            [
-                notifications == 0,
-                len(guesser.responses) == 0, state.history[-1] == 'xxxx',
-                percent_black > PERCENT_MATCH
-            ]
-        ):
+        elif notifications == 0 and len(guesser.responses) == 0:
             # suggest a first guess
             guess = guesser.peek_best_guess()
             text = 'Guess: ' + ''.join(map(str, guess))
@@ -334,38 +571,114 @@ def main():
             notify(text)
             notifications += 1
 
-        if SHOW_VIEW:
 
-            for (x, y, w, h), status in matches:
-                color = (0, 255, 0) if status == CORRECT else (0, 0, 255)
-                cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-
-            # draw status text
-            # color = (0, 255, 0) if percent_black > PERCENT_MATCH else (0, 0, 255)
-            color = (0, 0, 255)
-            text1 = f'% match: {percent_black:.4f}'
-            text2 = f'code: {state.history[-1]}'
-            text3 = f'mode: {state.mode}'
-            text4 = f'resp: {state.response or ""}'
-            for y, text in zip(
-                [30, 55, 80, 105], [text1, text2, text3, text4]
-            ):
-                cv2.putText(
-                    frame, text, (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color,
-                    2
-                )
-
-            cv2.imshow('Live Screen Difference', frame)
+def run_thread(target, stop: threading.Event, *args) -> threading.Thread:
+    '''Starts a pipeline thread, stopping every other one if it fails'''
+    def run():
+        try:
+            target(*args, stop)
+        finally:
+            stop.set()
+
+    thread = threading.Thread(target=run, name=target.__name__, daemon=True)
+    thread.start()
+    return thread
+
+
+def report(ring: FrameRing, decoder: Decoder, last: tuple, elapsed: float) -> tuple:
+    '''Prints the frames captured/decoded/dropped since the last report,
+    returning the new totals'''
+    totals = (ring.captured, decoder.decoded, ring.dropped)
+    captured, decoded, dropped = (now - before for now, before in zip(totals, last))
+    print(f'{captured / elapsed:.0f} fps captured, {decoded / elapsed:.0f} fps decoded, '
+          f'{dropped} dropped, queue depth {ring.depth()} (max {ring.max_depth})')
+    ring.max_depth = ring.depth()
+    return totals
+
+
+def main():
+    print('Pass -n to show popup notifications')
+    print('Pass -v to show live opencv view')
+    print('Pass -m to template match every frame (no light tracking)')
+
+    if SHOW_VIEW in sys.argv:
+        print(
+            'Press "f" when all lights are off to save a reference frame (ss.jpg)'
+        )
+        print('Press "r" to select the region containing lights')
+
+    # relative coords (to primary monitor)
+    region = {'left': 1296, 'top': 216, 'width': 636, 'height': 252}
+
+    if os.path.exists('ss.jpg'):
+        subtractive_frame = cv2.imread('ss.jpg')
+    else:
+        print('Subtractive frame not found')
+        subtractive_frame = np.zeros([0, 0])
+
+    # capture -> (ring) -> decode -> (events) -> guess, each on its own thread
+    pipeline = Pipeline(region, subtractive_frame)
+    ring = FrameRing()
+    events = queue.Queue()
+    decoder = Decoder(pipeline, events)
+    stop = threading.Event()
+    threads = [
+        run_thread(capture_frames, stop, pipeline, ring),
+        run_thread(decoder.run, stop, ring),
+        run_thread(suggest_guesses, stop, events),
+    ]
+
+    last_report, totals = time.time(), (0, 0, 0)
+
+    try:
+        while not stop.is_set():
+            if time.time() - last_report >= STATS_INTERVAL:
+                totals = report(ring, decoder, totals, time.time() - last_report)
+                last_report = time.time()
+
+            if not SHOW_VIEW:
+                stop.wait(0.1)
+                continue
+
+            with decoder.view_lock:
+                view, decoder.view = decoder.view, None
+            if view:
+                frame, diff_gray, matches, percent_black = view
+                state = decoder.state
+
+                for (x, y, w, h), status in matches:
+                    color = (0, 255, 0) if status == CORRECT else (0, 0, 255)
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+
+                # draw status text
+                # color = (0, 255, 0) if percent_black > PERCENT_MATCH else (0, 0, 255)
+                color = (0, 0, 255)
+                text1 = f'% match: {percent_black:.4f}'
+                text2 = f'code: {state.history[-1] if state.history else ""}'
+                text3 = f'mode: {state.mode}'
+                text4 = f'resp: {state.response or ""}'
+                text5 = f'tracked: {pipeline.tracked_frames}/{pipeline.tracked_frames + pipeline.matched_frames}'
+                text6 = f'queue: {ring.depth()}, dropped: {ring.dropped}'
+                for y, text in zip(
+                    [30, 55, 80, 105, 130, 155], [text1, text2, text3, text4, text5, text6]
+                ):
+                    cv2.putText(
+                        frame, text, (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color,
+                        2
+                    )
+
+                cv2.imshow('Live Screen Difference', frame)
 
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
                 break
-            elif key == ord('s'):
+            elif key == ord('s') and view:
                 filename = f'diff_frame_{int(time.time())}.png'
                 cv2.imwrite(filename, diff_gray)
                 print(f'Saved: {filename}')
             elif key == ord('r'):
                 region = select_screen_region()
+                decoder.control.put(lambda: pipeline.set_region(region))
                 print(f"Selected new region: {region}")
             elif key == ord('f'):
                 print('Saving fullscreen subtractive frame')
@@ -374,8 +687,12 @@ def main():
                     img = np.array(screenshot)
                     img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
                     cv2.imwrite('ss.jpg', img)
-
-    cv2.destroyAllWindows()
+                decoder.control.put(lambda: pipeline.set_reference(img))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        cv2.destroyAllWindows()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Builds the full decision tree of create_guesser's guesses.
+#
+# Starting from its fixed first guess, every possible response is followed
+# (splitting the candidates accordingly) and the guesser's next best guess is
+# recorded, until every candidate is solved. The tree is saved as JSON so
+# Guesser can look up guesses instead of searching (see use_decision_tree).
+#
+# This records the guesser's greedy policy (the best guess by the strategy's
+# one-step score at every node), not a tree searched for the least expected
+# or worst-case number of guesses. That's enough to prove the 5-guess bound:
+# every code is solved within max_guesses by this tree, so an optimal tree
+# can only do as well or better.
+#
+# Usage:
+#   ./decision_tree.py [-s <strategy>]
+
+import json
+import sys
+from collections import Counter, defaultdict
+
+from solve import (CODE_LEN, CORRECT, DECISION_TREE_PATH, DEFAULT_STRATEGY,
+                   _best_guess, candidates_signature, create_guesser, feedback,
+                   format, response_to_string)
+
+MAX_GUESSES = 5
+
+SOLVED = (CORRECT, ) * CODE_LEN
+
+
+def build_node(candidates, guess, depth, solved_at: Counter, strategy: str):
+    '''Returns the subtree for the given candidates, recording the number of
+    guesses needed for each solution in solved_at'''
+    buckets = defaultdict(list)
+    for candidate in candidates:
+        buckets[feedback(guess, candidate)].append(candidate)
+
+    children = {}
+    for response, bucket in sorted(buckets.items()):
+        if response == SOLVED:
+            solved_at[depth] += 1
+        else:
+            children[response_to_string(response)] = build_node(
+                bucket, _best_guess(bucket, strategy), depth + 1, solved_at, strategy)
+
+    return {'guess': format(guess), 'candidates': len(candidates), 'children': children}
+
+
+def build(strategy=DEFAULT_STRATEGY):
+    '''Returns the greedy decision tree of the strategy'''
+    guesser = create_guesser(use_tree=False, strategy=strategy)
+    candidates = guesser.candidates()
+    solved_at = Counter()
+    root = build_node(candidates, guesser.peek_best_guess(), 1, solved_at, strategy)
+
+    return {
+        'signature': candidates_signature(candidates),
+        'strategy': strategy,
+        'max_guesses': max(solved_at),
+        'solved_at': dict(sorted(solved_at.items())),
+        'root': root,
+    }
+
+
+def main():
+    strategy = sys.argv[sys.argv.index('-s') + 1] if '-s' in sys.argv else DEFAULT_STRATEGY
+    tree = build(strategy)
+    with open(DECISION_TREE_PATH, 'w') as f:
+        json.dump(tree, f, separators=(',', ':'))
+
+    total = sum(tree['solved_at'].values())
+    average = sum(n * count for n, count in tree['solved_at'].items()) / total
+    print(f'Saved {strategy} decision tree for {total} candidates to {DECISION_TREE_PATH}')
+    print('Guesses needed:', ', '.join(f'{n}: {count}' for n, count in tree['solved_at'].items()))
+    print(f'Average {average:.3f}, max {tree["max_guesses"]}')
+
+    assert tree['max_guesses'] <= MAX_GUESSES, 'Not every code is solved within 5 guesses!'
+    print(f'Every code is solved within {MAX_GUESSES} guesses')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# Replays a recorded video through analyze.py's pipeline (Pipeline, Decoder,
+# State) and compares the responses detected with the expected ones.
+#
+# Frames are read on a separate thread into a lossless FrameRing and decoded
+# as fast as possible (no realtime pacing). Frame timestamps come from the
+# video's frame rate, so the state machine sees the original timing.
+#
+# Each video has a JSON labels file (by default the video path with .json):
+#   region     the capture region the video was recorded from (relative
+#              to the reference frame, like analyze.py's region)
+#   offset     [top, left] of the region within the video frames
+#   reference  the reference frame (lights off) to subtract
+#   responses  the responses given in the video, in order
+#   mask       (optional) [x, y, w, h] rectangles of the region replaced by
+#              the reference, hiding overlays (like the debug view's text)
+#   boxes      (optional) [x, y, w, h] boxes drawn over the lights by the
+#              debug view, whose outlines are replaced by the reference
+#
+# demo.mp4 is a recording of analyze.py's debug view, so its labels mask the
+# status text and the boxes drawn around the lights.
+#
+# With -g, a video of the lights giving the responses (demo.mp4's by default)
+# is generated from the templates into a temporary file and replayed. It
+# checks the state machine and tracking, but not the template matching
+# thresholds (the lights are the templates).
+#
+# The exit status is 1 if any expected response is missed, a spurious one is
+# detected, or a frame raises an error.
+#
+# Usage:
+#   ./replay.py [video] [-l <labels file>] [-t <MATCH_THRESHOLD>]
+#               [-p <PERCENT_MATCH>] [-c <TEMPLATE_THRESHOLD>] [-m] [-s]
+#   ./replay.py -g [<response>[,<response>...]] [-m] [-s]
+#
+#   -m  template match every frame (no light tracking)
+#   -s  show the state machine's messages
+
+import contextlib
+import difflib
+import io
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+import cv2
+import numpy as np
+
+import analyze
+from analyze import (CORRECT, INCORRECT, TEMPLATE_PATHS, Decoder, FrameRing,
+                     Pipeline, State, load_template, run_thread)
+
+# synthetic videos use demo.mp4's region and light positions (top left of
+# each light within the region)
+SYNTHETIC_REGION = {'left': 1296, 'top': 216, 'width': 636, 'height': 252}
+SYNTHETIC_LIGHTS = [(107, 102), (239, 113), (375, 124), (514, 136)]
+SYNTHETIC_FPS = 60
+SYNTHETIC_RESPONSES = 'wpww,pwcw,wwpw,cwww,cccc'
+# mean BGR colour of each status in demo.mp4's diff, the lights are tinted
+# with them so the light tracker can tell them apart like in a recording
+SYNTHETIC_COLORS = {CORRECT: (52, 98, 73), INCORRECT: (95, 112, 90)}
+# frames each state is shown for, under State's 400ms repeat timeout
+STATE_FRAMES = 16
+
+# pixels masked either side of the labels' box outlines (the debug view draws
+# them 2px wide, and the video's compression smears them)
+BOX_MASK_WIDTH = 5
+
+
+def overlay_mask(labels: dict, shape) -> np.ndarray | None:
+    '''Returns the pixels of the region covered by the labels' mask
+    rectangles and box outlines (None if there are none)'''
+    if not labels.get('mask') and not labels.get('boxes'):
+        return None
+    mask = np.zeros((*shape[:2], 1), np.uint8)
+    for x, y, w, h in labels.get('mask', []):
+        mask[max(y, 0):y + h, max(x, 0):x + w] = 1
+    for x, y, w, h in labels.get('boxes', []):
+        cv2.rectangle(mask, (x, y), (x + w, y + h), 1, 2 * BOX_MASK_WIDTH + 1)
+    return mask.astype(bool)
+
+
+def read_frames(video, ring: FrameRing, offset, size, reference, mask, stop: threading.Event):
+    '''Reads the region of every frame of the video into the ring, replacing
+    the masked pixels with the reference'''
+    fps = video.get(cv2.CAP_PROP_FPS) or 60
+    top, left = offset
+    w, h = size
+    frame_num = 0
+    while not stop.is_set():
+        ok, frame = video.read()
+        if not ok:
+            break
+        slot = ring.acquire((h, w, 3))
+        np.copyto(slot, frame[top:top + h, left:left + w])
+        if mask is not None:
+            np.copyto(slot, reference, where=mask)
+        ring.put(frame_num / fps, slot)
+        frame_num += 1
+    ring.close()
+
+
+def response_states(response: str) -> list:
+    '''Returns the (lights, frames) shown while a guess is entered and its
+    response flashes'''
+    flash1 = ''.join('0' if r == 'w' else '1' for r in response)
+    flash2 = ''.join({'c': '1', 'w': '0', 'p': 'x'}[r] for r in response)
+
+    states = [('xxxx', 2 * STATE_FRAMES)]
+    states += [('0' * i + 'x' * (4 - i), STATE_FRAMES) for i in range(1, 5)]
+    if flash1 == flash2:
+        # identical flashes are only seen by holding them past the timeout
+        states.append((flash1, 3 * STATE_FRAMES))
+    else:
+        states += [(flash1, STATE_FRAMES), (flash2, STATE_FRAMES)] * 3
+    states.append(('xxxx', 2 * STATE_FRAMES))
+    return states
+
+
+def synthesize(video_path: str, responses: list) -> dict:
+    '''Writes a video of the lights giving the responses, drawn with the
+    templates on a black background, returning its labels'''
+    lights = {}
+    for status, path in TEMPLATE_PATHS.items():
+        # scale the colour to the template's brightness, so the diff's
+        # grayscale still matches the template
+        color = np.array(SYNTHETIC_COLORS[status], np.float32)
+        color /= cv2.cvtColor(color.reshape(1, 1, 3), cv2.COLOR_BGR2GRAY)[0, 0]
+        template = load_template(path)[..., None] * color
+        lights[status] = np.clip(template, 0, 255).astype(np.uint8)
+    w, h = SYNTHETIC_REGION['width'], SYNTHETIC_REGION['height']
+
+    video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), SYNTHETIC_FPS, (w, h))
+    assert video.isOpened(), f'Failed to create {video_path}'
+    for response in responses:
+        for state, frames in response_states(response):
+            frame = np.zeros((h, w, 3), np.uint8)
+            for (x, y), light in zip(SYNTHETIC_LIGHTS, state):
+                if light in lights:
+                    t = lights[light]
+                    frame[y:y + t.shape[0], x:x + t.shape[1]] = t
+            for _ in range(frames):
+                video.write(frame)
+    video.release()
+
+    return {'region': SYNTHETIC_REGION, 'offset': [0, 0], 'responses': responses}
+
+
+def replay(video_path: str, labels: dict, track=True) -> dict:
+    '''Decodes every frame of a video, returning the responses detected and
+    the decoding stats'''
+    if labels.get('reference') and os.path.exists(labels['reference']):
+        subtractive_frame = cv2.imread(labels['reference'])
+    else:
+        if labels.get('reference'):
+            print('Reference frame not found')
+        subtractive_frame = np.zeros([0, 0])
+
+    region = labels['region']
+    pipeline = Pipeline(region, subtractive_frame, capture=False)
+    pipeline.track = track
+    events = queue.Queue()
+    decoder = Decoder(pipeline, events)
+
+    video = cv2.VideoCapture(video_path)
+    assert video.isOpened(), f'Failed to open {video_path}'
+    ring = FrameRing(drop=False)
+    run_thread(read_frames, threading.Event(), video, ring,
+               labels.get('offset', (0, 0)), (region['width'], region['height']),
+               pipeline.cropped_subtractive_frame, overlay_mask(labels, pipeline.shape))
+
+    errors = []
+    start = perf_counter()
+    while (item := ring.get()) is not None:
+        timestamp, frame_num, frame = item
+        try:
+            decoder.decode(timestamp, frame)
+        except Exception as e:
+            # the live analyzer would crash here, note it and start over
+            errors.append((frame_num, repr(e)))
+            decoder.state = State(verbose=False)
+        finally:
+            ring.release(frame)
+    elapsed = perf_counter() - start
+
+    return {
+        'responses': [response for event, response in events.queue if event == 'response'],
+        'frames': ring.captured,
+        'time': elapsed,
+        'video_time': ring.captured / (video.get(cv2.CAP_PROP_FPS) or 60),
+        'tracked': pipeline.tracked_frames,
+        'errors': errors,
+    }
+
+
+def report(expected: list, result: dict) -> bool:
+    '''Prints how a video was decoded, returning whether all the expected
+    responses (and nothing else) were detected without errors'''
+    detected = result['responses']
+    matcher = difflib.SequenceMatcher(None, expected, detected, autojunk=False)
+    correct = sum(block.size for block in matcher.get_matching_blocks())
+
+    print(f'Replayed {result["frames"]} frames ({result["video_time"]:.1f}s of video) '
+          f'in {result["time"]:.2f}s: {result["frames"] / result["time"]:.0f} fps, '
+          f'{result["video_time"] / result["time"]:.1f}x realtime')
+    print(f'Tracked {result["tracked"]}/{result["frames"]} frames without template matching')
+    print(f'Expected: {" ".join(expected)}')
+    print(f'Detected: {" ".join(detected)}')
+    print(f'Accuracy: {correct}/{len(expected)} responses detected, '
+          f'{len(detected) - correct} spurious')
+
+    if result['errors']:
+        print(f'\n{len(result["errors"])} frames raised errors:')
+        for frame_num, error in result['errors'][:10]:
+            print(f'  frame {frame_num}: {error}')
+
+    return correct == len(expected) == len(detected) and not result['errors']
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith('-') else 'demo.mp4'
+
+    def arg(flag, default):
+        i = sys.argv.index(flag) + 1 if flag in sys.argv else len(sys.argv)
+        return sys.argv[i] if i < len(sys.argv) and not sys.argv[i].startswith('-') else default
+
+    analyze.MATCH_THRESHOLD = int(arg('-t', analyze.MATCH_THRESHOLD))
+    analyze.PERCENT_MATCH = float(arg('-p', analyze.PERCENT_MATCH))
+    analyze.TEMPLATE_THRESHOLD = float(arg('-c', analyze.TEMPLATE_THRESHOLD))
+
+    # the state machine always prints its progress
+    output = sys.stdout if '-s' in sys.argv else io.StringIO()
+    with tempfile.TemporaryDirectory() as tmp:
+        if '-g' in sys.argv:
+            video_path = os.path.join(tmp, 'synthetic.mp4')
+            labels = synthesize(video_path, arg('-g', SYNTHETIC_RESPONSES).split(','))
+        else:
+            with open(arg('-l', os.path.splitext(video_path)[0] + '.json')) as f:
+                labels = json.load(f)
+        with contextlib.redirect_stdout(output):
+            result = replay(video_path, labels, track='-m' not in sys.argv)
+
+    if not report(labels['responses'], result):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
@@ -5,43 +5,102 @@
 # - present in the solution but in the incorrect position
 # - not present in the solution
 
+import hashlib
+import json
+import os
 import sys
-from collections import defaultdict
+import tempfile
 from functools import cache
 from itertools import product
+from multiprocessing import Pool
 from typing import Callable
 
+import numpy as np
+
 WRONG, PARTIAL, CORRECT = range(3)
 
-ALL_POSSIBLE_CODES = list(product(range(1, 10), repeat=4))
+DIGITS = range(1, 10)
+CODE_LEN = 4
+
+ALL_POSSIBLE_CODES = list(product(DIGITS, repeat=CODE_LEN))
+
+ALL_CODES_MASK = np.ones(len(ALL_POSSIBLE_CODES), dtype=bool)
+ALL_CODES_MASK.flags.writeable = False
+
+# feedback for every (guess, solution) pair, indexed like ALL_POSSIBLE_CODES
+FEEDBACK_PATH = 'feedback.npy'
+
+# responses are encoded in base 3 (one digit per position)
+NUM_RESPONSES = 3**CODE_LEN
+
+# guesses for every response sequence (built by decision_tree.py)
+DECISION_TREE_PATH = 'decision_tree.json'
+
+# guess scoring strategy (see STRATEGIES)
+DEFAULT_STRATEGY = 'minimax'
 
 
 class Guesser:
     '''Accepts guesses and responses and generates possible candidates'''
 
-    def __init__(self, fixed_responses: tuple[tuple[int, ...], ...] = tuple()):
+    def __init__(self, fixed_responses: tuple[tuple[int, ...], ...] = tuple(),
+                 strategy: str = DEFAULT_STRATEGY):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Unknown strategy {strategy!r}, expected one of {", ".join(STRATEGIES)}')
         self.responses: list[tuple] = []
         self.filters: list[Callable] = []
         self.fixed_responses = fixed_responses
+        self.strategy = strategy
+        # candidates as a mask over ALL_POSSIBLE_CODES, before (base_mask) and
+        # after narrowing by the responses. Masks are never modified in place,
+        # so they can be shared.
+        self.base_mask = ALL_CODES_MASK
+        self.mask = ALL_CODES_MASK
+        self._candidates = None
+        self.tree = None
+        self.node = None  # current decision tree node (None = live search)
 
     def add(self, guess: tuple[int, ...], response: tuple[int, ...]):
         self.responses.append((guess, response))
+        self.mask = self.mask & response_mask(guess, response)
+        self._candidates = None
+        if self.node is not None:
+            if self.node['guess'] == format(guess):
+                self.node = self.node['children'].get(response_to_string(response))
+            else:
+                self.node = None
 
     def add_filter(self, func: Callable):
         self.filters.append(func)
+        self.base_mask = filters_mask(tuple(self.filters))
+        self.mask = self.mask & filters_mask((func, ))
+        self._candidates = None
+
+    def use_decision_tree(self, tree: dict) -> bool:
+        '''Looks up guesses in a tree built by decision_tree.py (as long as
+        the responses follow it). Returns whether the tree matches this
+        guesser's filters, strategy and first guess.'''
+        matches = (
+            tree.get('strategy', DEFAULT_STRATEGY) == self.strategy
+            and tree['signature'] == filters_signature(tuple(self.filters))
+            and (not self.fixed_responses or tree['root']['guess'] == format(self.fixed_responses[0]))
+        )
+        if matches and not self.responses:
+            self.tree = self.node = tree['root']
+        return self.node is not None
 
     def candidates(self):
-        candidates = []
-        for candidate in find_candidates(tuple(self.responses)):
-            if all(validator(candidate) for validator in self.filters):
-                candidates.append(candidate)
-        return candidates
+        if self._candidates is None:
+            self._candidates = [ALL_POSSIBLE_CODES[i] for i in np.flatnonzero(self.mask)]
+        return self._candidates
 
     def peek_best_guess(self) -> tuple:
         '''Queries the next best guess without consuming it'''
+        if self.node is not None:
+            return tuple(map(int, self.node['guess']))
         if self.fixed_responses:
             return self.fixed_responses[0]
-        return _best_guess(self.candidates())
+        return _best_guess(self.candidates(), self.strategy)
 
     def consume_best_guess(self) -> tuple:
         if self.fixed_responses:
@@ -49,10 +108,13 @@ class Guesser:
             response = self.fixed_responses[0]
             self.fixed_responses = self.fixed_responses[1:]
             return response
-        return _best_guess(self.candidates())
+        return self.peek_best_guess()
 
     def clear_responses(self):
         self.responses.clear()
+        self.mask = self.base_mask
+        self._candidates = None
+        self.node = self.tree
 
 
 class DataSource:
@@ -96,30 +158,84 @@ def string_to_response(response_str: str):
     return tuple(map('wpc'.index, response_str))
 
 
+def response_to_string(response) -> str:
+    return ''.join('wpc'[r] for r in response)
+
+
+def code_index(code) -> int:
+    '''Returns the index of a code in ALL_POSSIBLE_CODES'''
+    idx = 0
+    for d in code:
+        idx = idx * len(DIGITS) + d - DIGITS[0]
+    return idx
+
+
+def encode_response(response) -> int:
+    return sum(r * 3**i for i, r in enumerate(response))
+
+
+def build_feedback_matrix():
+    '''Returns the encoded feedback of every guess (row) for every solution
+    (column), matching feedback()'''
+    codes = np.array(ALL_POSSIBLE_CODES, dtype=np.uint8)
+    guesses, solutions = codes[:, None, :], codes[None, :, :]
+
+    matrix = np.zeros((len(codes), len(codes)), dtype=np.uint8)
+    for i in range(CODE_LEN):
+        correct = guesses[..., i] == solutions[..., i]
+        present = (guesses[..., i, None] == solutions).any(axis=-1)
+        response = np.where(correct, CORRECT, np.where(present, PARTIAL, WRONG))
+        matrix += (response * 3**i).astype(np.uint8)
+    return matrix
+
+
 @cache
-def find_candidates(responses: tuple):
-    candidates = []
-    for candidate in ALL_POSSIBLE_CODES:
-        if all(
-            feedback(guess, candidate) == response
-            for guess, response in responses
-        ):
-            candidates.append(candidate)
-    return candidates.copy()
+def feedback_matrix() -> np.ndarray:
+    '''Loads the feedback matrix, building and caching it on first use'''
+    if os.path.exists(FEEDBACK_PATH):
+        return np.load(FEEDBACK_PATH, mmap_mode='r')
+    matrix = build_feedback_matrix()
+
+    # write to a temporary file first, so other processes building it at the
+    # same time never load a partial file
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(FEEDBACK_PATH) or '.', suffix='.npy', delete=False
+    ) as f:
+        np.save(f, matrix)
+    os.replace(f.name, FEEDBACK_PATH)
+    return matrix
+
+
+def response_mask(guess, response) -> np.ndarray:
+    '''Returns the mask of codes which would give this response to the guess'''
+    return feedback_matrix()[code_index(guess)] == encode_response(response)
+
+
+@cache
+def filters_mask(filters: tuple) -> np.ndarray:
+    '''Returns the mask of codes passing every filter (each is only run once
+    per code, as filters are usually module level functions)'''
+    mask = np.fromiter(
+        (all(f(code) for f in filters) for code in ALL_POSSIBLE_CODES),
+        dtype=bool, count=len(ALL_POSSIBLE_CODES)
+    )
+    mask.flags.writeable = False
+    return mask
+
+
+@cache
+def filters_signature(filters: tuple) -> str:
+    '''Signature of the candidates passing the filters (before any responses)'''
+    mask = filters_mask(filters)
+    return candidates_signature([ALL_POSSIBLE_CODES[i] for i in np.flatnonzero(mask)])
 
 
 def feedback(guess, solution):
     '''Returns feedback for a guess given the solution'''
-
-    result = tuple()
-    for s, g in zip(solution, guess):
-        if g == s:
-            result += (CORRECT, )
-        elif g in solution:
-            result += (PARTIAL, )
-        else:
-            result += (WRONG, )
-    return result
+    return tuple(
+        CORRECT if g == s else PARTIAL if g in solution else WRONG
+        for s, g in zip(solution, guess)
+    )
 
 
 def solve_loop(guesser: Guesser, data_source: DataSource):
@@ -149,57 +265,140 @@ def format(digits):
     return ''.join(str(d) for d in digits)
 
 
-def score_guess(guess, candidates):
-    '''Returns a score indicating how well the guess splits the solution candidates'''
+# Guess scoring strategies. Each maps the response counts of a chunk of guesses
+# (one row of NUM_RESPONSES bucket sizes per guess) to scores (lower is better).
+STRATEGIES = {
+    # size of the largest bucket (worst case)
+    'minimax': lambda counts: counts.max(axis=1),
+    # expected number of remaining candidates
+    'expected_size': lambda counts: (counts**2).sum(axis=1) / counts.sum(axis=1),
+    # (negated) information gained
+    'entropy': lambda counts: (
+        np.where(counts > 0, counts * np.log2(np.maximum(counts, 1)), 0).sum(axis=1) / counts.sum(axis=1)
+        - np.log2(counts.sum(axis=1))
+    ),
+    # (negated) number of distinct responses
+    'most_parts': lambda counts: -(counts > 0).sum(axis=1),
+}
+
+# guesses scored at a time (bounds temporary memory)
+GUESS_CHUNK = 1024
+
+# candidates * guesses above which scoring is split across scoring_pool
+PARALLEL_MIN_PAIRS = 2_000_000
+
+# process pool used to score guesses (set by main with -j <workers>)
+scoring_pool = None
+
+
+def response_counts(start: int, stop: int, indices) -> np.ndarray:
+    '''Returns the number of candidates (given by index) giving each response
+    to each guess in ALL_POSSIBLE_CODES[start:stop]'''
+    responses = feedback_matrix()[start:stop, indices].astype(np.int64)
+    # offset each row's responses so one bincount counts every row
+    rows = np.arange(len(responses))[:, None] * NUM_RESPONSES
+    counts = np.bincount((responses + rows).ravel(), minlength=len(responses) * NUM_RESPONSES)
+    return counts.reshape(-1, NUM_RESPONSES)
+
+
+def score_chunk(task) -> np.ndarray:
+    start, stop, indices, strategy = task
+    return STRATEGIES[strategy](response_counts(start, stop, indices))
+
+
+def score_guesses(candidates, strategy=DEFAULT_STRATEGY) -> np.ndarray:
+    '''Scores every guess in ALL_POSSIBLE_CODES'''
+    indices = [code_index(c) for c in candidates]
+    tasks = [
+        (start, min(start + GUESS_CHUNK, len(ALL_POSSIBLE_CODES)), indices, strategy)
+        for start in range(0, len(ALL_POSSIBLE_CODES), GUESS_CHUNK)
+    ]
+    if scoring_pool and len(indices) * len(ALL_POSSIBLE_CODES) >= PARALLEL_MIN_PAIRS:
+        return np.concatenate(scoring_pool.map(score_chunk, tasks))
+    return np.concatenate([score_chunk(task) for task in tasks])
+
+
+def _best_guess(candidates, strategy=DEFAULT_STRATEGY):
+    if len(candidates) == 1:
+        return candidates[0]
+    if not candidates:
+        raise Exception('No best guess!')
 
-    buckets = defaultdict(list)
-    for solution in candidates:
-        response = feedback(guess, solution)
-        buckets[response].append(solution)
+    # lowest score, preferring guesses which may be the solution, then the
+    # first in ALL_POSSIBLE_CODES
+    scores = score_guesses(candidates, strategy)
+    best = np.isclose(scores, scores.min())
+    is_candidate = np.zeros(len(ALL_POSSIBLE_CODES), dtype=bool)
+    is_candidate[[code_index(c) for c in candidates]] = True
+    if (best & is_candidate).any():
+        best &= is_candidate
+    return ALL_POSSIBLE_CODES[np.argmax(best)]
 
-    # a good guess minimizes the size of the largest bucket (worst-case).
-    # however, im not 100% sure feedback frequency is the best metric to use.
-    return max(len(b) for b in buckets.values())
 
+def candidates_signature(candidates) -> str:
+    '''Identifies a set of candidates (so decision trees are only used with
+    the filters they were built for)'''
+    return hashlib.sha1(' '.join(map(format, sorted(candidates))).encode()).hexdigest()
 
-def _best_guess(candidates):
-    if len(candidates) == 1:
-        return candidates[0]
 
-    best = (float('inf'), True, None)
-    for guess in ALL_POSSIBLE_CODES:
-        score = score_guess(guess, candidates)
-        best = min(best, (score, guess not in candidates, guess))
-    if best[-1] is not None:
-        return best[-1]
-    raise Exception('No best guess!')
+@cache
+def load_decision_tree() -> dict | None:
+    if os.path.exists(DECISION_TREE_PATH):
+        with open(DECISION_TREE_PATH) as f:
+            return json.load(f)
+    return None
+
+
+# Filters are module level functions so their masks are cached across guessers
+
 
+def last_digit_is_9(code):
+    '''Prior knowledge that the last digit is always 9'''
+    return code[-1] == 9
 
-def create_guesser():
+
+def distinct_digits(code):
+    '''Assume that digits are distinct'''
+    return len(set(code)) == len(code)
+
+
+def create_guesser(use_tree=True, strategy=DEFAULT_STRATEGY):
     '''Creates and a configures a most informed guesser'''
 
-    # g = Guesser(((1, 2, 3, 4), (5, 6, 7, 8)))
-    g = Guesser(((1, 2, 3, 4), ))
+    # g = Guesser(((1, 2, 3, 4), (5, 6, 7, 8)), strategy)
+    g = Guesser(((1, 2, 3, 4), ), strategy)
 
-    # add prior knowledge that the last digit is always 9
-    g.add_filter(lambda c: c[-1] == 9)
+    g.add_filter(last_digit_is_9)
+    g.add_filter(distinct_digits)
 
-    # assume that digits are distinct
-    g.add_filter(lambda c: len(set(c)) == len(c))
+    # look up guesses instead of searching (falls back to searching if the
+    # tree was built for other filters)
+    if use_tree and (tree := load_decision_tree()):
+        if not g.use_decision_tree(tree):
+            print(f'WARNING: {DECISION_TREE_PATH} does not match the guesser, rebuild it')
 
     return g
 
 
 def main():
+    global scoring_pool
 
     if '-i' in sys.argv:
         data_source = ManualDataSource()
     else:
         data_source = AutomaticDataSource()
 
-    guesser = create_guesser()
+    strategy = sys.argv[sys.argv.index('-s') + 1] if '-s' in sys.argv else DEFAULT_STRATEGY
+    guesser = create_guesser(strategy=strategy)
+
+    if '-j' in sys.argv:
+        scoring_pool = Pool(int(sys.argv[sys.argv.index('-j') + 1]))
 
-    solve_loop(guesser, data_source)
+    try:
+        solve_loop(guesser, data_source)
+    finally:
+        if scoring_pool:
+            scoring_pool.terminate()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# Compares the guess scoring strategies.
+#
+# Every candidate secret is played through solve_loop with a simulated data
+# source (which takes create_guesser's guesses and answers them with the
+# secret's feedback), and the number of guesses needed is tallied for each
+# strategy. Games are spread across a process pool.
+#
+# Usage:
+#   ./strategies.py [-j <workers>] [-s <strategy>[,<strategy>...]]
+
+import contextlib
+import io
+import os
+import sys
+from collections import Counter
+from multiprocessing import Pool
+from time import perf_counter
+
+from solve import (STRATEGIES, DataSource, create_guesser, feedback,
+                   solve_loop)
+
+
+class SimulatedDataSource(DataSource):
+    '''Provides the guesser's guesses and answers them for a known secret'''
+
+    def __init__(self, secret: tuple):
+        self.secret = secret
+        self.guesses = []
+
+    def get(self, guesser):
+        guess = guesser.consume_best_guess()
+        self.guesses.append(guess)
+        return guess, feedback(guess, self.secret)
+
+
+def play(task) -> int | None:
+    '''Returns the number of guesses needed to solve a secret (None if the
+    guesser failed)'''
+    secret, strategy = task
+    guesser = create_guesser(use_tree=False, strategy=strategy)
+    data_source = SimulatedDataSource(secret)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solve_loop(guesser, data_source)
+
+    candidates = guesser.candidates()
+    if candidates != [secret]:
+        return None
+    # the loop stops once the solution is known, which still needs entering
+    return len(data_source.guesses) + (data_source.guesses[-1:] != [secret])
+
+
+def main():
+    workers = int(sys.argv[sys.argv.index('-j') + 1]) if '-j' in sys.argv else os.cpu_count()
+    strategies = sys.argv[sys.argv.index('-s') + 1].split(',') if '-s' in sys.argv else list(STRATEGIES)
+
+    secrets = create_guesser(use_tree=False).candidates()
+    print(f'Playing {len(secrets)} secrets with {workers} workers\n')
+    print(f'{"strategy":<14} {"average":>8} {"max":>4} {"failed":>6} {"time":>7}  guesses needed')
+
+    with Pool(workers) as pool:
+        for strategy in strategies:
+            start = perf_counter()
+            results = pool.map(play, [(secret, strategy) for secret in secrets])
+            elapsed = perf_counter() - start
+
+            solved = [n for n in results if n is not None]
+            counts = Counter(solved)
+            distribution = ', '.join(f'{n}: {counts[n]}' for n in sorted(counts))
+            print(f'{strategy:<14} {sum(solved) / len(solved):>8.3f} {max(solved):>4} '
+                  f'{len(results) - len(solved):>6} {elapsed:>6.2f}s  {distribution}')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
@@ -1,3 +1,5 @@
+from search import bfs
+
 START = ((1, 2, 3), (4, 5, 6), (7, 8, 9))
 
 
@@ -43,17 +45,7 @@ def neighbors(state):
 
 
 def solve(start):
-    visited = {start}
-    q = [(start, tuple())]
-    while q:
-        state, path = q.pop(0)
-        if solved(state):
-            return path
-
-        for n, move in neighbors(state):
-            if n not in visited:
-                visited.add(n)
-                q.append((n, path + (move, )))
+    return bfs(start, neighbors, solved)
 
 
 if __name__ == '__main__':
@@ -1,3 +1,5 @@
+from search import bfs
+
 EMPTY, TALL, SHORT, LONG, SQUARE = range(5)
 
 START = (SQUARE, SHORT, TALL, LONG, EMPTY)
@@ -11,20 +13,15 @@ def swap(state, src, tar):
     return tuple(items)
 
 
+def neighbors(state):
+    tar = state.index(EMPTY)
+    for src in state:
+        if src != tar:
+            yield swap(state, src, tar), (src, tar)
+
+
 def solve(start):
-    q = [(start, tuple())]
-    visited = {start}
-    while q:
-        state, path = q.pop(0)
-        if state == GOAL:
-            return path
-        tar = state.index(EMPTY)
-        for src in state:
-            if src != tar:
-                nstate = swap(state, src, tar)
-                if nstate not in visited:
-                    visited.add(nstate)
-                    q.append((nstate, path + ((src, tar), )))
+    return bfs(start, neighbors, lambda state: state == GOAL)
 
 
 path = solve(START)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Bidirectional (meet-in-the-middle) search for the full rotating tiles goal.
+#
+# Runs a breadth-first search forward from INIT (using MOVES) and backward
+# from GOAL (undoing MOVES with counter-clockwise rotations), always expanding
+# the smaller frontier by one layer. Once the frontiers meet, the rest of that
+# layer is still checked so the joined move sequence is optimal. This visits
+# about 2*b^(d/2) states instead of b^d. Both sides only generate canonical
+# move sequences (see make_canonical_moves).
+#
+# Usage:
+#   ./bidirectional.py [-b packed] [-d <max depth>]
+
+import sys
+from time import time
+
+from solve import (CANONICAL_MOVES, GOAL, INIT, MAX_MOVES, ROOT_CONTEXT, Path,
+                   PathStore, State, TupleBackend, get_backend)
+
+
+class Frontier:
+    '''One direction of the search'''
+
+    def __init__(self, start: State, step):
+        self.step = step  # (state, move) -> next state
+        self.nodes = PathStore()
+        self.visited: dict[State, int] = {start: 0}
+        self.layer: list[tuple[State, int, int]] = [(start, 0, ROOT_CONTEXT)]
+        self.depth = 0
+
+    def path(self, state: State) -> Path:
+        return self.nodes.path(self.visited[state])
+
+    def expand(self, other: 'Frontier'):
+        '''Expands the next layer. Returns the (total length, state) of the
+        best meeting point with the other frontier, or None.'''
+        best = None
+        next_layer = []
+
+        for state, node, ctx in self.layer:
+            for move, new_ctx in CANONICAL_MOVES[ctx]:
+                new_state = self.step(state, move)
+                if new_state in self.visited:
+                    continue
+                new_node = self.nodes.add(node, move)
+                self.visited[new_state] = new_node
+                next_layer.append((new_state, new_node, new_ctx))
+
+                if new_state in other.visited:
+                    length = self.depth + 1 + len(other.path(new_state))
+                    if best is None or length < best[0]:
+                        best = (length, new_state)
+
+        self.layer = next_layer
+        self.depth += 1
+        return best
+
+
+def bidirectional_solve(start: State, goal: State, max_moves=MAX_MOVES, backend=None):
+    '''Returns the shortest path from start to goal, or None if there is none
+    within max_moves'''
+    backend = backend or TupleBackend
+    if start == goal:
+        return tuple()
+
+    forward = Frontier(start, backend.rotate)
+    backward = Frontier(goal, backend.rotate_inverse)
+    start_time = time()
+
+    while forward.layer and backward.layer and forward.depth + backward.depth < max_moves:
+        smaller = forward if len(forward.layer) <= len(backward.layer) else backward
+        other = backward if smaller is forward else forward
+        meeting = smaller.expand(other)
+
+        elapsed = time() - start_time
+        print(f'{elapsed:>6.1f}s  Depths {forward.depth}/{backward.depth}, '
+              f'{len(forward.visited) + len(backward.visited)} states')
+
+        if meeting:
+            _, state = meeting
+            # the backward path undoes moves from the goal, so replay it reversed
+            return forward.path(state) + backward.path(state)[::-1]
+
+    return None
+
+
+def main():
+    backend = get_backend()
+    max_moves = int(sys.argv[sys.argv.index('-d') + 1]) if '-d' in sys.argv else MAX_MOVES
+
+    if (solution := bidirectional_solve(
+            backend.encode(INIT), backend.encode(GOAL), max_moves, backend)) is not None:
+        print(f'Found optimal solution of length {len(solution)}')
+        print(solution)
+    else:
+        print(f'No solution within {max_moves} moves')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Memory-bounded IDA* search for the rotating tiles puzzle.
+#
+# Uses the same MOVES, backends and heuristics as the A* in solve.py, but only
+# keeps the current path in memory (plus an optional size-bounded transposition
+# table with LRU eviction). Only canonical move sequences are generated (see
+# make_canonical_moves).
+#
+# Usage:
+#   ./ida_star.py [-b packed] [-tt <entries>]
+#
+# Searches for a solution shorter than BEST_KNOWN_SOLUION using the pattern
+# database heuristic (which is admissible), so finding none proves it optimal.
+
+import sys
+from collections import OrderedDict
+from time import time
+
+import pattern_db
+from solve import (BEST_KNOWN_SOLUION, CANONICAL_MOVES, GOAL, INIT, MAX_MOVES,
+                   ROOT_CONTEXT, CallableHeuristic, State, TupleBackend,
+                   get_backend)
+
+FOUND = -1
+INF = float('inf')
+
+
+def ida_solve(
+    grid: State,
+    solved,
+    heuristic,
+    max_moves=MAX_MOVES,
+    tt_size: int = 0,  # max transposition table entries (0 = disabled)
+    backend=None,
+):
+    '''Returns the first (shortest, if heuristic is admissible) solution as a
+    (grid, path) tuple, or None if there is none within max_moves'''
+
+    rotate = (backend or TupleBackend).rotate
+    engine = CallableHeuristic(heuristic) if callable(heuristic) else heuristic
+    tt: OrderedDict[tuple, int] = OrderedDict()
+    path: list[int] = []
+    goal = None
+    nodes = 0
+
+    def search(grid, hstate, g, bound, ctx):
+        nonlocal goal, nodes
+        nodes += 1
+
+        f = g + engine.value(hstate)
+        if f > bound:
+            return f
+
+        if solved(grid):
+            goal = grid
+            return FOUND
+
+        if tt_size:
+            # successors depend on the previous moves, so they're part of the key
+            key = (grid, ctx)
+            seen = tt.get(key)
+            if seen is not None and seen <= g:
+                tt.move_to_end(key)
+                return INF  # already searched with at least as many moves left
+            tt[key] = g
+            tt.move_to_end(key)
+            if len(tt) > tt_size:
+                tt.popitem(last=False)
+
+        next_bound = INF
+        for move, new_ctx in CANONICAL_MOVES[ctx]:
+            new_grid = rotate(grid, move)
+            new_hstate = engine.child(hstate, grid, move, new_grid)
+            path.append(move)
+            t = search(new_grid, new_hstate, g + 1, bound, new_ctx)
+            if t == FOUND:
+                return FOUND
+            path.pop()
+            next_bound = min(next_bound, t)
+
+        return next_bound
+
+    start_time = time()
+    hstate = engine.initial(grid)
+    bound = engine.value(hstate)
+
+    while bound <= max_moves:
+        tt.clear()
+        t = search(grid, hstate, 0, bound, ROOT_CONTEXT)
+        elapsed = time() - start_time
+        print(f'{elapsed:>6.1f}s  Bound {bound} searched ({nodes} nodes)')
+
+        if t == FOUND:
+            return goal, tuple(path)
+        if t == INF:
+            break
+        bound = t
+
+    return None
+
+
+def main():
+    backend = get_backend()
+    tt_size = int(sys.argv[sys.argv.index('-tt') + 1]) if '-tt' in sys.argv else 0
+
+    pdb = pattern_db.load(backend=backend)
+    goal = backend.encode(GOAL)
+
+    def solved(grid: State):
+        return grid == goal
+
+    max_moves = len(BEST_KNOWN_SOLUION) - 1
+    print(f'Searching for solutions of up to {max_moves} moves')
+
+    if result := ida_solve(backend.encode(INIT), solved, pdb,
+                           max_moves=max_moves, tt_size=tt_size,
+                           backend=backend):
+        _, solution = result
+        print(f'Found optimal solution of length {len(solution)}')
+        print(solution)
+    else:
+        print(f'No solution under {len(BEST_KNOWN_SOLUION)} moves. '
+              'BEST_KNOWN_SOLUION is optimal.')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
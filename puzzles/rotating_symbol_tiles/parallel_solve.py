@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Parallel version of solve_incremental_multi.
+#
+# The first few levels of recursive_solve are expanded in the main process
+# until there are enough independent branches, which are then explored by a
+# pool of worker processes. Workers share:
+# - the stage solution cache (find_all_solutions_up_to), persisted to
+#   solve.STORE_PATH unless --no-store is passed
+# - the best total path length found so far (longer branches are pruned)
+# and append final paths to data.log as soon as they're found.
+#
+# Usage:
+#   ./parallel_solve.py [-b packed] [-j <workers>] [--no-store]
+
+import os
+import sys
+from multiprocessing import Lock, Manager, Pool, Value
+
+import solve
+from solve import (BACKENDS, COLS, INIT, ROWS, STORE_PATH, SolutionStore,
+                   extra_moves_for_level, find_all_solutions_up_to,
+                   get_backend, log_final_path, next_level, recursive_solve)
+
+# number of branches to create per worker before fanning out
+TASKS_PER_WORKER = 4
+
+NO_SOLUTION = 2**31 - 1
+
+# per-process state (set by init_worker)
+best_len = None
+log_lock = None
+
+
+def init_worker(cache, best, lock):
+    '''Sets up shared state. cache is either a shared dict or the path of a
+    SolutionStore (each process opens its own connection).'''
+    global best_len, log_lock
+    solve.solution_cache = SolutionStore(cache) if isinstance(cache, str) else cache
+    best_len = best
+    log_lock = lock
+
+
+def current_best():
+    return best_len.value
+
+
+def explore(task):
+    '''Explores one branch to completion. Returns the number of final paths found.'''
+    grid, n, prefix, backend_name = task
+    backend = BACKENDS[backend_name]
+    found = 0
+
+    for subpath in recursive_solve(grid, n, backend, len(prefix), current_best):
+        final_path = prefix + tuple(subpath)
+        with log_lock:
+            if len(final_path) > best_len.value:
+                continue
+            best_len.value = len(final_path)
+            log_final_path(final_path)
+        found += 1
+
+    return found
+
+
+def expand_tasks(grid, n, backend, min_tasks):
+    '''Expands levels of recursive_solve until there are at least min_tasks
+    independent branches (or the last level is reached)'''
+    tasks = [(grid, n, tuple())]
+
+    while len(tasks) < min_tasks and all(n <= ROWS * COLS - 1 for _, n, _ in tasks):
+        next_tasks = []
+        for grid, n, prefix in tasks:
+            solutions = find_all_solutions_up_to(
+                grid, n, extra_moves_for_level(n), backend=backend)
+            next_tasks += [
+                (ngrid, next_level(n), prefix + path) for ngrid, path in solutions
+            ]
+        tasks = next_tasks
+
+    print(f'Expanded {len(tasks)} branches')
+    return [(grid, n, prefix, backend.name) for grid, n, prefix in tasks]
+
+
+def main():
+    backend = get_backend()
+    workers = int(sys.argv[sys.argv.index('-j') + 1]) if '-j' in sys.argv else os.cpu_count()
+
+    with Manager() as manager:
+        cache = manager.dict() if '--no-store' in sys.argv else STORE_PATH
+        best = Value('i', NO_SOLUTION)
+        lock = Lock()
+        init_worker(cache, best, lock)
+
+        tasks = expand_tasks(backend.encode(INIT), 1, backend, workers * TASKS_PER_WORKER)
+
+        with Pool(workers, initializer=init_worker, initargs=(cache, best, lock)) as pool:
+            for i, found in enumerate(pool.imap_unordered(explore, tasks)):
+                print(f'Branch {i + 1}/{len(tasks)} done: {found} paths '
+                      f'(best length {best.value})')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
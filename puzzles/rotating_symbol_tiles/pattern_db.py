@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Pattern database heuristic for the full 25 tile goal.
+#
+# Tiles are split into disjoint groups. For each group, a backward BFS from the
+# goal (using counter-clockwise rotations) computes the exact number of moves
+# needed to place just that group's tiles, for every placement of them. Tables
+# are stored as raw bytes (one byte per placement, 0xff = unreachable) and
+# loaded via mmap.
+#
+# NOTE: unlike sliding tile puzzles, one rotation can move tiles from up to
+# four groups at once, so simply adding group costs overestimates. The
+# admissible combination used here is max(max(costs), ceil(sum(costs) / 4)).
+#
+# Usage:
+#   ./pattern_db.py build       # (re)build all tables
+#   ./pattern_db.py [-b packed] # optimal A* from INIT (builds missing tables)
+
+import mmap
+import os
+import sys
+from collections import deque
+from itertools import batched
+from time import time
+
+from solve import (ALL_COORDS, COLS, GOAL, INIT, INVERSE_PERMS, MOVE_CELLS,
+                   ROWS, State, _solve_up_to, get_backend)
+
+PDB_DIR = 'pdb'
+CELLS = ROWS * COLS
+UNREACHABLE = 0xff
+
+# max number of tiles a single move can relocate (one per group)
+TILES_PER_MOVE = 4
+
+GOAL_TILES = tuple(v for row in GOAL for v in row if v != -1)
+DEFAULT_GROUPS = tuple(batched(GOAL_TILES, 4))
+
+GOAL_CELLS = {GOAL[r][c]: r * COLS + c for r, c in ALL_COORDS}
+
+
+def rank(cells) -> int:
+    '''Returns the table index of a placement of a group's tiles'''
+    return sum(cell * CELLS**i for i, cell in enumerate(cells))
+
+
+def table_path(tiles) -> str:
+    return os.path.join(PDB_DIR, 'tiles_' + '-'.join(map(str, tiles)) + '.bin')
+
+
+def build_table(tiles) -> bytearray:
+    '''Backward BFS over all placements of the given tiles'''
+    table = bytearray([UNREACHABLE]) * CELLS**len(tiles)
+    start = tuple(GOAL_CELLS[v] for v in tiles)
+    table[rank(start)] = 0
+
+    q = deque([start])
+    while q:
+        cells = q.popleft()
+        depth = table[rank(cells)] + 1
+        for perm in INVERSE_PERMS:
+            prev = tuple(perm[cell] for cell in cells)
+            idx = rank(prev)
+            if table[idx] == UNREACHABLE:
+                table[idx] = depth
+                q.append(prev)
+    return table
+
+
+def build(groups=DEFAULT_GROUPS):
+    os.makedirs(PDB_DIR, exist_ok=True)
+    for tiles in groups:
+        start_time = time()
+        table = build_table(tiles)
+        with open(table_path(tiles), 'wb') as f:
+            f.write(table)
+        print(f'{time() - start_time:>5.1f}s  Built table for tiles', tiles,
+              f'(max depth {max(v for v in table if v != UNREACHABLE)})')
+
+
+def load_table(tiles) -> mmap.mmap:
+    with open(table_path(tiles), 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class PatternDatabase:
+    '''Heuristic engine (see IncrementalHeuristic) backed by pattern tables.
+    The heuristic state is the tuple of table indices, one per group, which a
+    move updates from the four cells it touches.
+    '''
+
+    def __init__(self, groups, backend):
+        self.groups = tuple(groups)
+        self.backend = backend
+        self.tables = [load_table(tiles) for tiles in self.groups]
+
+        # tile -> (group, index weight)
+        self.slots = {
+            v: (group, CELLS**i)
+            for group, tiles in enumerate(self.groups)
+            for i, v in enumerate(tiles)
+        }
+
+    def initial(self, state: State):
+        cells = {self.backend.cell(state, idx): idx for idx in range(CELLS)}
+        return tuple(rank(cells[v] for v in tiles) for tiles in self.groups)
+
+    def child(self, hstate, state: State, move: int, new_state: State):
+        indices = None
+        for src, tar in MOVE_CELLS[move]:
+            if slot := self.slots.get(self.backend.cell(state, src)):
+                group, weight = slot
+                indices = indices or list(hstate)
+                indices[group] += (tar - src) * weight
+        return tuple(indices) if indices else hstate
+
+    def value(self, hstate) -> int:
+        costs = [table[idx] for table, idx in zip(self.tables, hstate)]
+        return max(max(costs), -(-sum(costs) // TILES_PER_MOVE))
+
+
+def load(groups=DEFAULT_GROUPS, backend=None) -> PatternDatabase:
+    '''Loads the pattern database, building any missing tables first'''
+    if missing := [t for t in groups if not os.path.exists(table_path(t))]:
+        build(missing)
+    return PatternDatabase(groups, backend or get_backend())
+
+
+def main():
+    if 'build' in sys.argv:
+        build()
+        return
+
+    backend = get_backend()
+    pdb = load(backend=backend)
+    goal = backend.encode(GOAL)
+    print('Initial estimate:', pdb.value(pdb.initial(backend.encode(INIT))))
+
+    def solved(grid: State):
+        return grid == goal
+
+    grid, solution = _solve_up_to(
+        backend.encode(INIT), solved, pdb, max_moves=None, backend=backend,
+        reopen=True)
+    print(f'Found optimal solution of length {len(solution)}')
+    print(solution)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# Peephole optimizer for move sequences.
+#
+# Precomputes the shortest move sequence for every tile permutation reachable
+# within TABLE_DEPTH moves. Each window of a solution is then replaced by the
+# shortest sequence producing the same permutation (so the replacement is
+# valid regardless of the tiles on the board). Windows are evaluated in
+# parallel, and non-overlapping replacements are applied until nothing
+# improves.
+#
+# Usage:
+#   ./shorten.py                # shortens BEST_KNOWN_SOLUION
+#   ./shorten.py -f data.log    # shortens every solution in a log file
+#   ./shorten.py -d <depth> -w <max window> -j <workers>
+
+import ast
+import os
+import sys
+from multiprocessing import Pool
+from time import time
+
+from solve import (BEST_KNOWN_SOLUION, CANONICAL_MOVES, COLS, INIT,
+                   INVERSE_PERMS, ROOT_CONTEXT, ROWS, Path, rotate)
+
+TABLE_DEPTH = 5
+MAX_WINDOW = 12
+
+Perm = bytes
+
+IDENTITY: Perm = bytes(range(ROWS * COLS))
+
+# for each move, the cell each tile came from
+GATHERS = tuple(bytes(perm) for perm in INVERSE_PERMS)
+
+# shortest known sequence for each permutation (set by init_worker)
+table: dict[Perm, Path] = {}
+
+
+def apply_move(perm: Perm, move: int) -> Perm:
+    '''Returns the permutation of making the given move after perm'''
+    return bytes(perm[cell] for cell in GATHERS[move])
+
+
+def build_table(depth=TABLE_DEPTH) -> dict[Perm, Path]:
+    '''Breadth-first search over canonical sequences of up to depth moves'''
+    start_time = time()
+    shortest = {IDENTITY: tuple()}
+    layer = [(IDENTITY, tuple(), ROOT_CONTEXT)]
+
+    for _ in range(depth):
+        next_layer = []
+        for perm, path, ctx in layer:
+            for move, new_ctx in CANONICAL_MOVES[ctx]:
+                new_perm = apply_move(perm, move)
+                if new_perm not in shortest:
+                    shortest[new_perm] = path + (move, )
+                    next_layer.append((new_perm, path + (move, ), new_ctx))
+        layer = next_layer
+
+    print(f'{time() - start_time:>4.1f}s  Built table of {len(shortest)} permutations')
+    return shortest
+
+
+def init_worker(depth):
+    global table
+    if not table:
+        table = build_table(depth)
+
+
+def best_replacement(task):
+    '''Finds the replacement saving the most moves among the windows starting
+    at the given index. Returns (saving, start, end, replacement) or None.'''
+    moves, start, max_window = task
+    best = None
+    perm = IDENTITY
+
+    for end in range(start + 1, min(len(moves), start + max_window) + 1):
+        perm = apply_move(perm, moves[end - 1])
+        short = table.get(perm)
+        if short is not None and len(short) < end - start:
+            saving = end - start - len(short)
+            if best is None or saving > best[0]:
+                best = (saving, start, end, short)
+
+    return best
+
+
+def shorten(moves: Path, pool, max_window=MAX_WINDOW) -> Path:
+    while True:
+        tasks = [(moves, start, max_window) for start in range(len(moves))]
+        candidates = [c for c in pool.map(best_replacement, tasks) if c]
+        if not candidates:
+            return moves
+
+        # apply non-overlapping replacements, largest savings first
+        chosen = []
+        for c in sorted(candidates, key=lambda c: -c[0]):
+            if all(c[2] <= o[1] or o[2] <= c[1] for o in chosen):
+                chosen.append(c)
+
+        for saving, start, end, short in sorted(chosen, key=lambda c: -c[1]):
+            print(f'Replacing moves {start}-{end - 1} {moves[start:end]} with {short}')
+            moves = moves[:start] + short + moves[end:]
+
+
+def simulate(moves: Path):
+    grid = INIT
+    for m in moves:
+        grid = rotate(grid, m)
+    return grid
+
+
+def read_log(fname) -> list[Path]:
+    '''Reads solutions written by log_final_path'''
+    solutions = []
+    for line in open(fname):
+        if line.strip():
+            _, moves = line.split(' ', 1)
+            solutions.append(ast.literal_eval(moves))
+    return solutions
+
+
+def main():
+    def arg(flag, default):
+        return int(sys.argv[sys.argv.index(flag) + 1]) if flag in sys.argv else default
+
+    depth = arg('-d', TABLE_DEPTH)
+    max_window = arg('-w', MAX_WINDOW)
+    workers = arg('-j', os.cpu_count())
+
+    if '-f' in sys.argv:
+        solutions = read_log(sys.argv[sys.argv.index('-f') + 1])
+    else:
+        solutions = [BEST_KNOWN_SOLUION]
+
+    init_worker(depth)
+
+    with Pool(workers, initializer=init_worker, initargs=(depth, )) as pool:
+        best = None
+        for moves in solutions:
+            short = shorten(moves, pool, max_window)
+            assert simulate(short) == simulate(moves)
+            print(f'{len(moves)} => {len(short)} moves')
+            if best is None or len(short) < len(best):
+                best = short
+
+    print(f'\nShortest solution ({len(best)} moves)\n')
+    print(best)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print('interrupted')
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
+import json
+import sqlite3
 import sys
+from array import array
 from collections import Counter
 from functools import cache
 from heapq import heappop, heappush
-from itertools import count, pairwise
-from time import time
-from typing import Callable
+from itertools import pairwise
+from time import perf_counter, time
+from typing import Callable, Iterator, MutableMapping
 
 Grid = tuple[tuple[int, ...], ...]
 
@@ -46,6 +49,9 @@ ROTATION_SEQUENCE = [
     (0, 0),
 ]
 
+# counter-clockwise rotation (undoes a move)
+INVERSE_ROTATION_SEQUENCE = ROTATION_SEQUENCE[::-1]
+
 
 def generate_num_order():
     '''Generates a tile ID to position mapping.
@@ -113,78 +119,513 @@ def rotate(grid: Grid, move: int):
     return tuple(map(tuple, ngrid))
 
 
+def rotate_inverse(grid: Grid, move: int):
+    '''Undoes the given move on a copy of the grid'''
+    r, c = divmod(move, COLS - 1)  # upper left tile
+    ngrid = list(map(list, grid))
+    for (src_r, src_c), (tar_r, tar_c) in pairwise(INVERSE_ROTATION_SEQUENCE):
+        ngrid[r + tar_r][c + tar_c] = grid[r + src_r][c + src_c]
+    return tuple(map(tuple, ngrid))
+
+
+# Packed states store all 25 cells in a single int (5 bits per cell, in
+# ALL_COORDS order). Empty cells (-1) are stored as 0b11111.
+PackedGrid = int
+
+CELL_BITS = 5
+CELL_MASK = (1 << CELL_BITS) - 1
+ROW_BITS = CELL_BITS * COLS
+
+
+def pack(grid: Grid) -> PackedGrid:
+    '''Packs a grid into a single integer'''
+    state = 0
+    for idx, (r, c) in enumerate(ALL_COORDS):
+        state |= (grid[r][c] & CELL_MASK) << (idx * CELL_BITS)
+    return state
+
+
+def unpack(state: PackedGrid) -> Grid:
+    '''Unpacks an integer into a grid'''
+    vals = [(state >> (idx * CELL_BITS)) & CELL_MASK
+            for idx in range(ROWS * COLS)]
+    vals = [-1 if v == CELL_MASK else v for v in vals]
+    return tuple(tuple(vals[r * COLS:(r + 1) * COLS]) for r in range(ROWS))
+
+
+def cell_mask(r: int, c: int) -> int:
+    return CELL_MASK << ((r * COLS + c) * CELL_BITS)
+
+
+def make_packed_rotations(sequence=ROTATION_SEQUENCE):
+    '''Precomputes bit masks for each move.
+    Every rotated cell moves one step right, down, left or up, which is a
+    fixed shift of the packed integer. Returns a tuple of (keep, right, down,
+    left, up) masks per move.
+    '''
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    rotations = []
+    for move in MOVES:
+        r, c = divmod(move, COLS - 1)
+        keep = (1 << (ROWS * COLS * CELL_BITS)) - 1
+        masks = [0] * len(directions)
+        for (src_r, src_c), (tar_r, tar_c) in pairwise(sequence):
+            mask = cell_mask(r + src_r, c + src_c)
+            masks[directions.index((tar_r - src_r, tar_c - src_c))] |= mask
+            keep &= ~mask
+        rotations.append((keep, *masks))
+    return tuple(rotations)
+
+
+PACKED_ROTATIONS = make_packed_rotations()
+PACKED_INVERSE_ROTATIONS = make_packed_rotations(INVERSE_ROTATION_SEQUENCE)
+
+
+def rotate_packed(state: PackedGrid, move: int) -> PackedGrid:
+    '''Applies the given move to a packed grid'''
+    keep, right, down, left, up = PACKED_ROTATIONS[move]
+    return (
+        state & keep
+        | (state & right) << CELL_BITS
+        | (state & down) << ROW_BITS
+        | (state & left) >> CELL_BITS
+        | (state & up) >> ROW_BITS
+    )
+
+
+def rotate_inverse_packed(state: PackedGrid, move: int) -> PackedGrid:
+    '''Undoes the given move on a packed grid'''
+    keep, right, down, left, up = PACKED_INVERSE_ROTATIONS[move]
+    return (
+        state & keep
+        | (state & right) << CELL_BITS
+        | (state & down) << ROW_BITS
+        | (state & left) >> CELL_BITS
+        | (state & up) >> ROW_BITS
+    )
+
+
+# a knob turned this many times returns to its original state
+KNOB_PERIOD = 4
+
+
+def knobs_commute(a: int, b: int):
+    '''Returns whether two knobs rotate disjoint sets of tiles'''
+    ra, ca = divmod(a, COLS - 1)
+    rb, cb = divmod(b, COLS - 1)
+    return abs(ra - rb) >= 2 or abs(ca - cb) >= 2
+
+
+def make_canonical_moves():
+    '''Precomputes move generation for canonical move sequences.
+
+    A move context packs the last move and how many times in a row it was
+    made (last * KNOB_PERIOD + repeats). Each context maps to the (move, next
+    context) pairs that may follow it, skipping sequences that are equivalent
+    to others:
+    - a fourth consecutive turn of the same knob (identity)
+    - commuting knobs in decreasing order (only increasing order is kept)
+    The last entry (ROOT_CONTEXT) allows every move.
+    '''
+    table = []
+    for ctx in range(len(MOVES) * KNOB_PERIOD):
+        last, repeats = divmod(ctx, KNOB_PERIOD)
+        moves = []
+        for move in MOVES:
+            if move == last:
+                if repeats + 1 < KNOB_PERIOD:
+                    moves.append((move, ctx + 1))
+            elif not (move < last and knobs_commute(last, move)):
+                moves.append((move, move * KNOB_PERIOD + 1))
+        table.append(tuple(moves))
+    table.append(tuple((move, move * KNOB_PERIOD + 1) for move in MOVES))
+    return tuple(table)
+
+
+CANONICAL_MOVES = make_canonical_moves()
+ROOT_CONTEXT = len(CANONICAL_MOVES) - 1
+
 Path = tuple[int, ...]
-HeapItem = tuple[int | float, int, int, Grid]
-Solution = tuple[Grid, Path]
+State = Grid | PackedGrid
+HeapItem = tuple[int | float, int, int, State, object, int]
+Solution = tuple[State, Path]
 
 
-@cache
-def find_all_solutions_up_to(grid: Grid, n: int, extra_moves_allowed) -> list:
+class PathStore:
+    '''Compact predecessor storage for search nodes.
+    Each node only records its parent node and the move leading to it (in flat
+    arrays), so paths cost O(1) memory per state and are only rebuilt when
+    needed. Node 0 is the root.
+    '''
+
+    def __init__(self):
+        self.parents = array('I', [0])
+        self.moves = array('B', [0])
+
+    def __len__(self):
+        return len(self.parents)
+
+    def add(self, parent: int, move: int) -> int:
+        '''Records a new node and returns its handle'''
+        self.parents.append(parent)
+        self.moves.append(move)
+        return len(self.parents) - 1
+
+    def path(self, node: int) -> Path:
+        '''Rebuilds the moves leading from the root to the given node'''
+        path = []
+        while node:
+            path.append(self.moves[node])
+            node = self.parents[node]
+        return tuple(path[::-1])
+
+
+def state_bytes(state: State) -> int:
+    '''Estimates the memory used by one state (small ints are shared)'''
+    if isinstance(state, tuple):
+        return sys.getsizeof(state) + sum(sys.getsizeof(row) for row in state)
+    return sys.getsizeof(state)
+
+
+class SearchStats:
+    '''Live statistics for _solve_up_to.
+
+    Pass an instance to _solve_up_to (or set the module level search_stats) to
+    have the search sampled about every `interval` seconds. Each sample (a dict)
+    is passed to callback and appended as a JSON line to log_path, if given.
+    Counters are reset at the start of every search.
+    '''
+
+    CHECK_EVERY = 4096  # expansions between clock checks
+
+    def __init__(self, interval=1.0, callback=None, log_path=None):
+        self.interval = interval
+        self.callback = callback
+        self.log_path = log_path
+        self.searches = 0
+        self.samples: list[dict] = []
+
+    def begin(self):
+        self.searches += 1
+        self.heuristic_calls = 0
+        self.heuristic_time = 0.0
+        self.start_time = self.last_sample = time()
+
+    def due(self) -> bool:
+        return time() - self.last_sample >= self.interval
+
+    def sample(self, expanded, generated, duplicates, stale, q, visited,
+               nodes: PathStore, max_g, final=False) -> dict:
+        self.last_sample = time()
+        elapsed = max(self.last_sample - self.start_time, 1e-9)
+        key_bytes = state_bytes(next(iter(visited))) + sys.getsizeof(max_g)
+        record = {
+            'search': self.searches,
+            'elapsed': round(elapsed, 3),
+            'expanded': expanded,
+            'generated': generated,
+            'expanded_per_sec': round(expanded / elapsed),
+            'generated_per_sec': round(generated / elapsed),
+            'heap_size': len(q),
+            'visited_size': len(visited),
+            'visited_bytes': sys.getsizeof(visited) + len(visited) * key_bytes,
+            'path_store_bytes': len(nodes) * (nodes.parents.itemsize + nodes.moves.itemsize),
+            'heuristic_calls': self.heuristic_calls,
+            'heuristic_time': round(self.heuristic_time, 3),
+            'heuristic_share': round(self.heuristic_time / elapsed, 3),
+            'duplicates': duplicates,
+            'duplicate_ratio': round(duplicates / generated, 3) if generated else 0.0,
+            'stale_pops': stale,
+            'max_g': max_g,
+            'final': final,
+        }
+        self.samples.append(record)
+        if self.callback:
+            self.callback(record)
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        return record
+
+
+def print_stats(record: dict):
+    print(f"{record['elapsed']:>6.1f}s  {record['expanded_per_sec']}/s expanded, "
+          f"{record['generated_per_sec']}/s generated, heap {record['heap_size']}, "
+          f"visited {record['visited_size']} (~{record['visited_bytes'] >> 20} MiB), "
+          f"heuristic {record['heuristic_share']:.0%} of time, "
+          f"{record['duplicate_ratio']:.0%} duplicates")
+
+
+class TimedHeuristic:
+    '''Wraps a heuristic engine, recording call counts and time in stats'''
+
+    def __init__(self, engine, stats: SearchStats):
+        self.engine = engine
+        self.stats = stats
+
+    def initial(self, state: State):
+        return self._timed(self.engine.initial, state)
+
+    def child(self, hstate, state: State, move: int, new_state: State):
+        return self._timed(self.engine.child, hstate, state, move, new_state)
+
+    def value(self, hstate):
+        start = perf_counter()
+        result = self.engine.value(hstate)
+        self.stats.heuristic_time += perf_counter() - start
+        return result
+
+    def _timed(self, func, *args):
+        start = perf_counter()
+        result = func(*args)
+        self.stats.heuristic_time += perf_counter() - start
+        self.stats.heuristic_calls += 1
+        return result
+
+
+# Stats for all searches, set by main when passing --stats [log path]
+search_stats: SearchStats | None = None
+
+
+# Stage solutions keyed by (grid, n, extra_moves_allowed, backend name). This is
+# a plain dict by default, a SolutionStore when persisting results to disk, or
+# a dict shared by all workers in parallel_solve.py
+solution_cache: MutableMapping[tuple, list] = {}
+
+STORE_PATH = 'stages.db'
+STORE_MAX_BYTES = 2**30
+# bump whenever the search (or the stored format) can return different stage
+# solutions, so stores written by older versions are discarded
+STORE_VERSION = 2
+# cache hits recorded before their last_used times are written
+STORE_TOUCH_BATCH = 256
+GRID_BYTES = (ROWS * COLS * CELL_BITS + 7) // 8
+
+
+class SolutionStore(MutableMapping):
+    '''Persistent stage solution cache backed by sqlite.
+
+    Entries are keyed by the packed grid, so they are shared between backends
+    and processes, and survive restarts. Once the stored solutions exceed
+    max_bytes, the least recently used entries are evicted.
+
+    Stage results depend on ORDER and the search code, so the store records
+    both (in its meta table) and drops every entry written under others.
+    '''
+
+    def __init__(self, path=STORE_PATH, max_bytes=STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.touched = {}  # row key -> last used time, not yet written
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            self.db.execute('''
+                CREATE TABLE IF NOT EXISTS stages (
+                    grid BLOB, n INTEGER, extra INTEGER, solutions BLOB,
+                    size INTEGER, last_used REAL, PRIMARY KEY (grid, n, extra)
+                )''')
+            self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+            meta = {'order': ','.join(map(str, ORDER)), 'version': str(STORE_VERSION)}
+            stored = dict(self.db.execute('SELECT key, value FROM meta'))
+            if stored != meta:
+                if stored:
+                    print(f'Discarding {path}, written for another ORDER or search version')
+                self.db.execute('DELETE FROM stages')
+                self.db.execute('DELETE FROM meta')
+                self.db.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+
+    @staticmethod
+    def _row_key(key):
+        grid, n, extra_moves_allowed, backend_name = key
+        grid = pack(BACKENDS[backend_name].decode(grid))
+        return grid.to_bytes(GRID_BYTES, 'little'), n, extra_moves_allowed
+
+    @staticmethod
+    def _encode(solutions: list, backend) -> bytes:
+        '''Serializes solutions as (packed grid, path length, path) records'''
+        data = bytearray()
+        for grid, path in solutions:
+            data += pack(backend.decode(grid)).to_bytes(GRID_BYTES, 'little')
+            data.append(len(path))
+            data += bytes(path)
+        return bytes(data)
+
+    @staticmethod
+    def _decode(data: bytes, backend) -> list:
+        solutions = []
+        i = 0
+        while i < len(data):
+            grid = unpack(int.from_bytes(data[i:i + GRID_BYTES], 'little'))
+            length = data[i + GRID_BYTES]
+            i += GRID_BYTES + 1
+            solutions.append((backend.encode(grid), tuple(data[i:i + length])))
+            i += length
+        return solutions
+
+    def __getitem__(self, key):
+        row_key = self._row_key(key)
+        row = self.db.execute(
+            'SELECT solutions FROM stages WHERE grid=? AND n=? AND extra=?',
+            row_key).fetchone()
+        if row is None:
+            raise KeyError(key)
+        self.touched[row_key] = time()
+        if len(self.touched) >= STORE_TOUCH_BATCH:
+            self.flush()
+            self.db.commit()
+        return self._decode(row[0], BACKENDS[key[-1]])
+
+    def __setitem__(self, key, solutions):
+        data = self._encode(solutions, BACKENDS[key[-1]])
+        self.db.execute(
+            'INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?, ?)',
+            (*self._row_key(key), data, len(data), time()))
+        self.flush()
+        self.evict()
+        self.db.commit()
+
+    def __delitem__(self, key):
+        cursor = self.db.execute(
+            'DELETE FROM stages WHERE grid=? AND n=? AND extra=?',
+            self._row_key(key))
+        self.db.commit()
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[tuple]:
+        '''Yields keys with packed grids'''
+        for grid, n, extra in self.db.execute('SELECT grid, n, extra FROM stages'):
+            yield int.from_bytes(grid, 'little'), n, extra, PackedBackend.name
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM stages').fetchone()[0]
+
+    def flush(self):
+        '''Writes the last used times of recent cache hits'''
+        self.db.executemany(
+            'UPDATE stages SET last_used=? WHERE grid=? AND n=? AND extra=?',
+            [(t, *row_key) for row_key, t in self.touched.items()])
+        self.touched.clear()
+
+    def evict(self):
+        '''Removes least recently used entries until under max_bytes'''
+        total, = self.db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM stages').fetchone()
+        while total > self.max_bytes:
+            rowid, size = self.db.execute(
+                'SELECT rowid, size FROM stages ORDER BY last_used LIMIT 1').fetchone()
+            self.db.execute('DELETE FROM stages WHERE rowid=?', (rowid, ))
+            total -= size
+
+
+def find_all_solutions_up_to(grid: State, n: int, extra_moves_allowed, backend=None) -> list:
+    backend = backend or TupleBackend
+    key = (grid, n, extra_moves_allowed, backend.name)
+    if (solutions := solution_cache.get(key)) is not None:
+        return solutions
 
     def solved(grid, n=n):
-        return solved_up_to(grid, n)
+        return backend.solved_up_to(grid, n)
 
-    def heuristic(grid, n=n):
-        return heuristic_up_to(grid, n)
+    heuristic = incremental_heuristic(n, backend)
 
     print(f'Finding solutions up to {n} with up to {
           extra_moves_allowed} extra moves')
     solutions = _solve_up_to(
-        grid, solved, heuristic, find_all_solutions=True, extra_moves_allowed=extra_moves_allowed)
+        grid, solved, heuristic, find_all_solutions=True, extra_moves_allowed=extra_moves_allowed,
+        backend=backend)
     assert isinstance(solutions, list)
+    solution_cache[key] = solutions
     return solutions
 
 
 def _solve_up_to(
-    grid: Grid,
-    solved: Callable[[Grid], bool],
-    heuristic: Callable[[Grid], int | float],
+    grid: State,
+    solved: Callable[[State], bool],
+    heuristic: 'Callable[[State], int | float] | IncrementalHeuristic',
     find_all_solutions: bool = False,
     max_moves=MAX_MOVES,
     extra_moves_allowed: int = 0,  # allow this many moves above the optimal solution
+    backend=None,
+    reopen: bool = False,  # re-expand states reached via a shorter path (optimal with a consistent heuristic)
+    stats: SearchStats | None = None,  # defaults to search_stats
 ):
-    solutions: list[tuple[Grid, Path]] = []
-    counter = count()
+    rotate = (backend or TupleBackend).rotate
+    engine = CallableHeuristic(heuristic) if callable(heuristic) else heuristic
+    solutions: list[tuple[State, Path]] = []
     max_len = 0
     start_time = time()
 
-    visited: dict[Grid, Path] = {grid: tuple()}
-    q: list[HeapItem] = [(heuristic(grid), 0, next(counter), grid)]
+    stats = stats or search_stats
+    if stats:
+        stats.begin()
+        engine = TimedHeuristic(engine, stats)
+    expanded = generated = duplicates = stale = 0
+
+    def sample(final=False):
+        if stats:
+            stats.sample(expanded, generated, duplicates, stale, q, visited,
+                         nodes, max_len, final)
+
+    # node handles double as heap tie-breakers (in discovery order)
+    visited: dict[State, int] = {grid: 0}
+    nodes = PathStore()
+    hstate = engine.initial(grid)
+    q: list[HeapItem] = [(engine.value(hstate), 0, 0, grid, hstate, ROOT_CONTEXT)]
 
     while q:
-        h, g, i, grid = heappop(q)
+        f, g, node, grid, hstate, ctx = heappop(q)
+
+        if reopen and g > visited[grid]:
+            stale += 1
+            continue  # stale entry (state was reached via a shorter path)
 
-        path = visited[grid]
-        if solutions and g + heuristic(grid) > len(solutions[0][1]) + extra_moves_allowed:
+        if solutions and f > len(solutions[0][1]) + extra_moves_allowed:
             continue
 
         if solved(grid):
+            path = nodes.path(node)
             print('Found a solution of length', len(path), path)
             if not find_all_solutions:
+                sample(final=True)
                 return grid, path
             solutions.append((grid, path))
         # NOTE: max_moves has little to no effect when used incrementally
-        if max_moves is not None and len(path) > max_moves:
+        if max_moves is not None and g > max_moves:
             continue
 
-        if len(path) > max_len:
-            max_len = len(path)
+        if g > max_len:
+            max_len = g
             elapsed = time() - start_time
             print(f'{elapsed:>4.1f}s  New max length', max_len)
 
-        for move in MOVES:
+        expanded += 1
+        if stats and expanded % stats.CHECK_EVERY == 0 and stats.due():
+            sample()
+
+        moves = CANONICAL_MOVES[ctx]
+        generated += len(moves)
+        for move, new_ctx in moves:
             new_grid = rotate(grid, move)
-            if new_grid not in visited:
-                visited[new_grid] = path + (move, )
+            if new_grid not in visited or reopen and g + 1 < visited[new_grid]:
+                visited[new_grid] = g + 1
+                new_hstate = engine.child(hstate, grid, move, new_grid)
                 heappush(
                     q, (
-                        heuristic(new_grid) + g + 1,
+                        engine.value(new_hstate) + g + 1,
                         g + 1,
-                        next(counter),
+                        nodes.add(node, move),
                         new_grid,
+                        new_hstate,
+                        new_ctx,
                     )
                 )
+            else:
+                duplicates += 1
 
+    sample(final=True)
     if find_all_solutions:
         return solutions
 
@@ -237,15 +678,16 @@ def simulate_solution(solution):
             input()
 
 
-def solve_all_at_once():
+def solve_all_at_once(backend=None):
+    backend = backend or TupleBackend
 
-    def heuristic(grid: Grid):
-        return heuristic_up_to(grid, ROWS * COLS - 1)
+    heuristic = incremental_heuristic(ROWS * COLS - 1, backend)
 
-    def solved(grid: Grid):
-        return solved_up_to(grid, ROWS * COLS - 1)
+    def solved(grid: State):
+        return backend.solved_up_to(grid, ROWS * COLS - 1)
 
-    if solution := solve_up_to(INIT, solved, heuristic):
+    if result := _solve_up_to(backend.encode(INIT), solved, heuristic, backend=backend):
+        _, solution = result
         print(f'Found solution of length {len(solution)}')
         print(solution)
     else:
@@ -265,6 +707,14 @@ def solved_up_to(grid: Grid, n):
 
 def heuristic_up_to(grid: Grid, n):
     '''Heuristic cost function considering tiles 0 through n and matching -1 tiles greedily.'''
+    positions = {grid[r][c]: (r, c) for r, c in ALL_COORDS}
+    neg1_tiles = [(r, c) for r, c in ALL_COORDS if grid[r][c] == -1]
+    return _heuristic_from_positions(positions, neg1_tiles, n)
+
+
+def _heuristic_from_positions(positions: dict, neg1_tiles: list, n):
+    '''Computes heuristic_up_to given each tile's (r,c) position and the
+    positions of all -1 tiles'''
 
     cost = 0
     unmatched_neg1_goal = []
@@ -276,11 +726,16 @@ def heuristic_up_to(grid: Grid, n):
         if expected_val == -1:
             unmatched_neg1_goal.append((expected_r, expected_c))
         else:
-            actual_r, actual_c = tile_pos(grid, expected_val)
+            actual_r, actual_c = positions[expected_val]
             cost += abs(expected_r - actual_r) + abs(expected_c - actual_c)
 
-    # Match unmatched -1s greedily
-    neg1_tiles = [(r, c) for r, c in ALL_COORDS if grid[r][c] == -1]
+    return 0.7 * (cost + match_neg1(unmatched_neg1_goal, neg1_tiles))
+
+
+def match_neg1(unmatched_neg1_goal, neg1_tiles):
+    '''Greedily matches -1 goal positions to -1 tiles. Returns the total
+    distance.'''
+    cost = 0
     used = set()
 
     for r_goal, c_goal in unmatched_neg1_goal:
@@ -297,16 +752,211 @@ def heuristic_up_to(grid: Grid, n):
             used.add(best_idx)
             cost += best
 
-    return 0.7 * cost
+    return cost
 
 
-def recursive_solve(grid: Grid, n=0):
-    if n > ROWS * COLS - 1:
-        assert solved_up_to(grid, ROWS * COLS - 1)
-        print('Solved path:')
-        yield []  # base case: end of path
-        return
+def solved_up_to_packed(state: PackedGrid, n):
+    '''Returns whether tiles from 0 through n are solved in a packed grid'''
+    mask = SOLVED_MASKS[n]
+    return state & mask == PACKED_GOAL & mask
+
+
+def heuristic_up_to_packed(state: PackedGrid, n):
+    '''Computes heuristic_up_to for a packed grid'''
+    positions = {}
+    neg1_tiles = []
+    for idx, pos in enumerate(ALL_COORDS):
+        v = (state >> (idx * CELL_BITS)) & CELL_MASK
+        if v == CELL_MASK:
+            neg1_tiles.append(pos)
+        else:
+            positions[v] = pos
+    return _heuristic_from_positions(positions, neg1_tiles, n)
+
+
+def make_solved_masks():
+    '''Returns the packed bits covering the cells of tiles 0 through n (for every n)'''
+    masks = []
+    mask = 0
+    for idx in range(ROWS * COLS):
+        mask |= cell_mask(*num_to_coord(idx))
+        masks.append(mask)
+    return tuple(masks)
+
+
+def grid_cell(grid: Grid, idx: int):
+    '''Returns the value at the given cell index (in ALL_COORDS order)'''
+    r, c = divmod(idx, COLS)
+    return grid[r][c]
+
+
+def packed_cell(state: PackedGrid, idx: int):
+    '''Returns the value at the given cell index of a packed grid'''
+    v = (state >> (idx * CELL_BITS)) & CELL_MASK
+    return -1 if v == CELL_MASK else v
+
+
+PACKED_GOAL = pack(GOAL)
+SOLVED_MASKS = make_solved_masks()
+
+
+class TupleBackend:
+    '''Stores states as nested tuples'''
+    name = 'tuple'
+    encode = staticmethod(lambda grid: grid)
+    decode = staticmethod(lambda grid: grid)
+    rotate = staticmethod(rotate)
+    rotate_inverse = staticmethod(rotate_inverse)
+    cell = staticmethod(grid_cell)
+    solved_up_to = staticmethod(solved_up_to)
+    heuristic_up_to = staticmethod(heuristic_up_to)
+
+
+class PackedBackend:
+    '''Stores states as packed integers (constant-time rotation, hashing and
+    equality)'''
+    name = 'packed'
+    encode = staticmethod(pack)
+    decode = staticmethod(unpack)
+    rotate = staticmethod(rotate_packed)
+    rotate_inverse = staticmethod(rotate_inverse_packed)
+    cell = staticmethod(packed_cell)
+    solved_up_to = staticmethod(solved_up_to_packed)
+    heuristic_up_to = staticmethod(heuristic_up_to_packed)
+
+
+BACKENDS = {b.name: b for b in (TupleBackend, PackedBackend)}
+
+
+def get_backend():
+    '''Returns the state backend selected with "-b <name>" (default: tuple)'''
+    if '-b' in sys.argv:
+        return BACKENDS[sys.argv[sys.argv.index('-b') + 1]]
+    return TupleBackend
+
+
+def make_move_cells():
+    '''Returns the (src, tar) cell indices of the tiles moved by each move'''
+    move_cells = []
+    for move in MOVES:
+        r, c = divmod(move, COLS - 1)
+        move_cells.append(tuple(
+            ((r + src_r) * COLS + c + src_c, (r + tar_r) * COLS + c + tar_c)
+            for (src_r, src_c), (tar_r, tar_c) in pairwise(ROTATION_SEQUENCE)
+        ))
+    return tuple(move_cells)
+
+
+MOVE_CELLS = make_move_cells()
+
+
+def make_inverse_perms():
+    '''Returns, for each move, the cell each tile came from (cell -> cell)'''
+    perms = []
+    for move in MOVES:
+        perm = list(range(ROWS * COLS))
+        for src, tar in MOVE_CELLS[move]:
+            perm[tar] = src
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+INVERSE_PERMS = make_inverse_perms()
 
+
+class CallableHeuristic:
+    '''Adapts a plain heuristic function to the heuristic engine interface'''
+
+    def __init__(self, func: Callable[[State], int | float]):
+        self.func = func
+
+    def initial(self, state: State):
+        return self.func(state)
+
+    def child(self, hstate, state: State, move: int, new_state: State):
+        return self.func(new_state)
+
+    def value(self, hstate) -> int | float:
+        return hstate
+
+
+class IncrementalHeuristic:
+    '''Evaluates heuristic_up_to(grid, n) incrementally.
+
+    Each search node carries a small heuristic state: the manhattan cost of
+    tiles 0 through n, the sorted cell indices of all -1 tiles (the only
+    positions the greedy matching needs), and the cost of that matching. A
+    move only touches four cells, so the manhattan cost is updated by a delta
+    and the -1 matching is only redone (and cached) when a -1 tile moves.
+    '''
+
+    def __init__(self, n: int, backend):
+        self.backend = backend
+
+        goal_coords = {}
+        self.goal_neg1 = []
+        for idx in range(n + 1):
+            r, c = num_to_coord(idx)
+            if GOAL[r][c] == -1:
+                self.goal_neg1.append((r, c))
+            else:
+                goal_coords[GOAL[r][c]] = (r, c)
+
+        # distance from each cell to a tile's goal (0 for untracked tiles)
+        self.cost = [
+            [dist(pos, goal_coords[v]) if v in goal_coords else 0
+             for pos in ALL_COORDS]
+            for v in range(ROWS * COLS)
+        ]
+        self.neg1_cost = cache(self._neg1_cost)
+
+    def _neg1_cost(self, neg1_cells: tuple[int, ...]):
+        neg1_tiles = [ALL_COORDS[i] for i in neg1_cells]
+        return match_neg1(self.goal_neg1, neg1_tiles)
+
+    def initial(self, state: State):
+        manhattan = 0
+        neg1_cells = []
+        for idx in range(ROWS * COLS):
+            v = self.backend.cell(state, idx)
+            if v == -1:
+                neg1_cells.append(idx)
+            else:
+                manhattan += self.cost[v][idx]
+        neg1_cells = tuple(neg1_cells)
+        return manhattan, neg1_cells, self.neg1_cost(neg1_cells)
+
+    def child(self, hstate, state: State, move: int, new_state: State):
+        manhattan, neg1_cells, neg1_cost = hstate
+        cell = self.backend.cell
+        cost = self.cost
+        moved_neg1 = {}
+
+        for src, tar in MOVE_CELLS[move]:
+            v = cell(state, src)
+            if v == -1:
+                moved_neg1[src] = tar
+            else:
+                manhattan += cost[v][tar] - cost[v][src]
+
+        if moved_neg1:
+            neg1_cells = tuple(sorted(moved_neg1.get(i, i) for i in neg1_cells))
+            neg1_cost = self.neg1_cost(neg1_cells)
+
+        return manhattan, neg1_cells, neg1_cost
+
+    def value(self, hstate) -> float:
+        manhattan, _, neg1_cost = hstate
+        return 0.7 * (manhattan + neg1_cost)
+
+
+@cache
+def incremental_heuristic(n: int, backend) -> IncrementalHeuristic:
+    return IncrementalHeuristic(n, backend)
+
+
+def extra_moves_for_level(n):
+    '''Returns the number of extra moves allowed when solving tiles through n'''
     extra_moves_allowed = 0
 
     # # Customize extra moves allowed based on current level
@@ -319,8 +969,29 @@ def recursive_solve(grid: Grid, n=0):
     # elif n >= 10:
     #     extra_moves_allowed = 0
 
+    return extra_moves_allowed
+
+
+def next_level(n):
+    '''Decides the next target number to solve for'''
+    return n+1 if 0 <= n <= 10 or n == ROWS * COLS - 1 else ROWS * COLS - 1
+
+
+def recursive_solve(
+    grid: State,
+    n=0,
+    backend=TupleBackend,
+    prefix_len=0,  # number of moves made before reaching grid
+    bound: Callable[[], int | float] | None = None,  # prunes longer paths
+):
+    if n > ROWS * COLS - 1:
+        assert backend.solved_up_to(grid, ROWS * COLS - 1)
+        print('Solved path:')
+        yield []  # base case: end of path
+        return
+
     solutions = find_all_solutions_up_to(
-        grid, n, extra_moves_allowed=extra_moves_allowed)
+        grid, n, extra_moves_allowed=extra_moves_for_level(n), backend=backend)
 
     if not solutions:
         print(f'Level {n} => no solutions!')
@@ -330,31 +1001,36 @@ def recursive_solve(grid: Grid, n=0):
     print(f'Level {n} => {len(solutions)} solutions between lengths {
           min(len_freq)} and {max(len_freq)}')
 
-    # Decide next target number to solve for
-    next_n = n+1 if 0 <= n <= 10 or n == ROWS * COLS - 1 else ROWS * COLS - 1
+    next_n = next_level(n)
 
     for ngrid, path in solutions:
-        for subpath in recursive_solve(ngrid, next_n):
+        path_len = prefix_len + len(path)
+        if bound is not None and path_len > bound():
+            continue
+        for subpath in recursive_solve(ngrid, next_n, backend, path_len, bound):
             full_path = path + tuple(subpath)
             yield full_path
 
 
-def solve_incremental_multi():
+def log_final_path(final_path: Path):
+    print('\033[92mFinal path length:', len(final_path), '\033[0m')
+    print('\033[92mMoves:', final_path, '\033[0m')
 
-    for final_path in recursive_solve(INIT, 1):
+    # if len(final_path) <= len(BEST_KNOWN_SOLUION):
+    #     with open('data.log', 'a') as f:
+    #         print(len(final_path), repr(final_path) + '\n', file=f)
 
-        print('\033[92mFinal path length:', len(final_path), '\033[0m')
-        print('\033[92mMoves:', final_path, '\033[0m')
+    with open('data.log', 'a') as f:
+        print(len(final_path), repr(final_path) + '\n', file=f)
 
-        # if len(final_path) <= len(BEST_KNOWN_SOLUION):
-        #     with open('data.log', 'a') as f:
-        #         print(len(final_path), repr(final_path) + '\n', file=f)
 
-        with open('data.log', 'a') as f:
-            print(len(final_path), repr(final_path) + '\n', file=f)
+def solve_incremental_multi(backend=TupleBackend):
 
+    for final_path in recursive_solve(backend.encode(INIT), 1, backend):
+        log_final_path(final_path)
 
-def solve_incremental():
+
+def solve_incremental(backend=TupleBackend):
     print('Solving new')
 
     all_moves = []
@@ -365,18 +1041,17 @@ def solve_incremental():
     # ns = [3, 4, 5, 6, 7, 8, 9, 10, 11, 24]
     # ns = [0, 1, 2, 4, 5, 6, 7, 9, 10, 11, ROWS * COLS - 1]
 
-    grid = INIT
+    grid = backend.encode(INIT)
     for n in ns:
 
         def solved(grid, n=n):
-            return solved_up_to(grid, n)
+            return backend.solved_up_to(grid, n)
 
-        def heuristic(grid, n=n):
-            return heuristic_up_to(grid, n)
+        heuristic = incremental_heuristic(n, backend)
 
         print(f'\n>>> Solving tiles through {n}', '\n')
-        grid, moves = solve_up_to(grid, solved, heuristic)
-        print_grid(grid)
+        grid, moves = _solve_up_to(grid, solved, heuristic, backend=backend)
+        print_grid(backend.decode(grid))
         all_moves.append(moves)
         print()
         print('Steps:', moves, f'({sum(map(len, all_moves))} total)')
@@ -395,13 +1070,21 @@ def solve_incremental():
     print(solution)
 
     print()
-    print_grid(grid)
+    print_grid(backend.decode(grid))
 
 
 def main():
+    global solution_cache, search_stats
+    backend = get_backend()
+
+    # print search statistics, optionally logging them as JSON lines
+    if '--stats' in sys.argv:
+        idx = sys.argv.index('--stats') + 1
+        log_path = sys.argv[idx] if idx < len(sys.argv) and not sys.argv[idx].startswith('-') else None
+        search_stats = SearchStats(callback=print_stats, log_path=log_path)
 
     if '-t' in sys.argv:
-        solve_all_at_once()
+        solve_all_at_once(backend)
     elif '-s' in sys.argv:
         # # solutions for potentially incorrect rotated states
         # solution = (11, 10, 9, 8, 8, 4, 0, 12, 9, 5, 1, 3, 6, 3, 8, 4, 8, 8, 5, 6, 6, 9, 10, 7,
@@ -411,9 +1094,12 @@ def main():
         solution = BEST_KNOWN_SOLUION
         simulate_solution(solution)
     elif '-m' in sys.argv:
-        solve_incremental()
+        solve_incremental(backend)
     else:
-        solve_incremental_multi()
+        # persist stage solutions so interrupted runs can resume
+        if '--no-store' not in sys.argv:
+            solution_cache = SolutionStore()
+        solve_incremental_multi(backend)
 
 
 if __name__ == '__main__':
@@ -9,6 +9,8 @@
 # Wheels are numbered from 0-4 from top to bottom
 # Bars are numberes from 0-5 from top to bottom
 
+from search import bfs
+
 NUM_WHEELS = 5
 NUM_BARS = 6
 
@@ -61,20 +63,13 @@ def neighbors(state):
         yield rotate_wheel(state, wheel), wheel
 
 
+def solved(state):
+    bars, wheels = state
+    return bars == GOAL_BAR_IDXS
+
+
 def solve(state: tuple[tuple, tuple]):
-    visited = {state}
-    q = [(state, tuple())]
-
-    while q:
-        state, path = q.pop(0)
-        bars, wheels = state
-        if bars == GOAL_BAR_IDXS:
-            return path
-
-        for n, move in neighbors(state):
-            if n not in visited:
-                visited.add(n)
-                q.append((n, path + (move, )))
+    return bfs(state, neighbors, solved)
 
 
 def main():
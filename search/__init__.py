@@ -0,0 +1,24 @@
+'''Shared graph search for the puzzle solvers.
+
+All searches are driven by callables:
+- neighbors(state) yields (next state, move) pairs
+- solved(state) returns whether a state is a goal
+- heuristic(state) estimates the number of moves left (informed searches)
+
+and return the tuple of moves leading from the start to a goal, or None.
+Visited states are stored in a parent-pointer map (state -> (parent, move)),
+so paths are only built once a goal is found.
+'''
+
+from search.informed import astar, ida_star
+from search.paths import reconstruct_path
+from search.uninformed import bfs, bfs_all, bidirectional
+
+__all__ = [
+    'astar',
+    'bfs',
+    'bfs_all',
+    'bidirectional',
+    'ida_star',
+    'reconstruct_path',
+]
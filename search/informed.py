@@ -0,0 +1,66 @@
+from heapq import heappop, heappush
+from itertools import count
+
+from search.paths import Parents, reconstruct_path
+
+FOUND = -1
+INF = float('inf')
+
+
+def astar(start, neighbors, solved, heuristic):
+    '''Returns the shortest path from start to a solved state (if heuristic is
+    admissible). Every move costs 1.'''
+    parents: Parents = {start: None}
+    costs = {start: 0}
+    tiebreak = count()  # states aren't necessarily comparable
+    q = [(heuristic(start), next(tiebreak), 0, start)]
+
+    while q:
+        _, _, g, state = heappop(q)
+        if g > costs[state]:
+            continue  # stale entry (state was reached via a shorter path)
+        if solved(state):
+            return reconstruct_path(parents, state)
+
+        for n, move in neighbors(state):
+            if n not in costs or g + 1 < costs[n]:
+                costs[n] = g + 1
+                parents[n] = state, move
+                heappush(q, (g + 1 + heuristic(n), next(tiebreak), g + 1, n))
+
+
+def ida_star(start, neighbors, solved, heuristic, max_depth=INF):
+    '''Returns the shortest path from start to a solved state (if heuristic is
+    admissible), only keeping the current path in memory'''
+    path = []
+    on_path = {start}
+
+    def search(state, g, bound):
+        f = g + heuristic(state)
+        if f > bound:
+            return f
+        if solved(state):
+            return FOUND
+
+        next_bound = INF
+        for n, move in neighbors(state):
+            if n in on_path:
+                continue
+            path.append(move)
+            on_path.add(n)
+            t = search(n, g + 1, bound)
+            if t == FOUND:
+                return FOUND
+            path.pop()
+            on_path.remove(n)
+            next_bound = min(next_bound, t)
+        return next_bound
+
+    bound = heuristic(start)
+    while bound <= max_depth:
+        t = search(start, 0, bound)
+        if t == FOUND:
+            return tuple(path)
+        if t == INF:
+            return None
+        bound = t
@@ -0,0 +1,13 @@
+from typing import Hashable
+
+# state -> (parent state, move), or None for the start state
+Parents = dict[Hashable, tuple[Hashable, object] | None]
+
+
+def reconstruct_path(parents: Parents, state) -> tuple:
+    '''Returns the moves leading from the start to the given state'''
+    path = []
+    while entry := parents[state]:
+        state, move = entry
+        path.append(move)
+    return tuple(path[::-1])
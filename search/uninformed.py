@@ -0,0 +1,79 @@
+from collections import deque
+
+from search.paths import Parents, reconstruct_path
+
+
+def bfs(start, neighbors, solved):
+    '''Returns the shortest path from start to a solved state'''
+    parents: Parents = {start: None}
+    q = deque([start])
+    while q:
+        state = q.popleft()
+        if solved(state):
+            return reconstruct_path(parents, state)
+
+        for n, move in neighbors(state):
+            if n not in parents:
+                parents[n] = state, move
+                q.append(n)
+
+
+def bfs_all(start, neighbors, solved):
+    '''Returns a (path, state) tuple for every solved state reachable in the
+    fewest possible moves'''
+    parents: Parents = {start: None}
+    q = deque([(start, 0)])
+    solutions = []
+    while q:
+        state, depth = q.popleft()
+        if solutions and depth > len(solutions[0][0]):
+            break
+        if solved(state):
+            solutions.append((reconstruct_path(parents, state), state))
+
+        for n, move in neighbors(state):
+            if n not in parents:
+                parents[n] = state, move
+                q.append((n, depth + 1))
+    return solutions
+
+
+def bidirectional(start, goal, neighbors, predecessors):
+    '''Returns the shortest path from start to goal, searching forward from
+    start and backward from goal. predecessors(state) yields (previous state,
+    move) pairs, where move leads from the previous state to state.'''
+    if start == goal:
+        return tuple()
+
+    # each side: (parents, current layer)
+    forward = {start: None}, [start]
+    backward = {goal: None}, [goal]
+
+    while forward[1] and backward[1]:
+        expand_forward = len(forward[1]) <= len(backward[1])
+        (parents, layer), (other, _) = (forward, backward) if expand_forward else (backward, forward)
+        expand = neighbors if expand_forward else predecessors
+
+        meeting = None
+        next_layer = []
+        for state in layer:
+            for n, move in expand(state):
+                if n in parents:
+                    continue
+                parents[n] = state, move
+                next_layer.append(n)
+                # finish the layer, keeping the shortest join
+                if n in other:
+                    length = len(reconstruct_path(parents, n)) + len(reconstruct_path(other, n))
+                    if meeting is None or length < meeting[0]:
+                        meeting = length, n
+
+        if expand_forward:
+            forward = parents, next_layer
+        else:
+            backward = parents, next_layer
+
+        if meeting:
+            _, state = meeting
+            # backward moves lead toward the goal, so replay them in reverse
+            return reconstruct_path(forward[0], state) + reconstruct_path(backward[0], state)[::-1]
@@ -0,0 +1,12 @@
+'''Shared image matching helpers for the screen reading scripts.
+
+Template matches are read from the score map returned by cv2.matchTemplate
+(one score per top left position). Boxes are (x, y, width, height) tuples.
+'''
+
+from vision.nms import match_boxes, nms
+
+__all__ = [
+    'match_boxes',
+    'nms',
+]
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    '''Greedy non-maximum suppression. Returns the indices of the boxes kept
+    (highest score first), dropping every box overlapping a higher scoring
+    kept box with an IoU above iou_threshold. Each kept box suppresses all
+    the others at once, so the Python work is per kept box only.'''
+    x1, y1 = boxes[:, 0].astype(np.float64), boxes[:, 1].astype(np.float64)
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = boxes[:, 2].astype(np.float64) * boxes[:, 3]
+
+    # ties keep their original order
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while len(order):
+        i, rest = order[0], order[1:]
+        keep.append(i)
+
+        inter = (
+            np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+            * np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        )
+        union = areas[i] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.intp)
+
+
+def match_boxes(result: np.ndarray, size, threshold: float, iou_threshold: float) -> list:
+    '''Returns non-overlapping boxes (highest score first) of the given
+    (width, height) at the positions of a matchTemplate score map scoring at
+    least threshold'''
+    w, h = size
+    ys, xs = np.nonzero(result >= threshold)
+    if not len(xs):
+        return []
+
+    boxes = np.column_stack([xs, ys, np.full_like(xs, w), np.full_like(ys, h)])
+    keep = nms(boxes, result[ys, xs], iou_threshold)
+    return [tuple(int(v) for v in boxes[i]) for i in keep]